@@ -0,0 +1,66 @@
+"""Попередні реалізації гарячих функцій, з якими порівнюються поточні в тестах і бенчмарках."""
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, String, Table, insert
+from sqlalchemy.orm import Session
+
+from market_reporter import MarketPairRow
+
+
+def filter_significant_changes(
+        market_data: list[MarketPairRow], threshold: float, processed_market_pairs: set[str]) -> list[dict]:
+    """
+    Фільтрує пари, ціна яких змінилася більше ніж на threshold% за інтервал.
+    Залишає торгові пари, які ще не були оброблені. Відсортовує пари за зміною ціни.
+    """
+    significant_changes = []
+    market_pairs = {}
+
+    for data in market_data:
+        market_pair = data.market_pair
+
+        # Пропускаємо вже оброблені пари
+        if market_pair in processed_market_pairs:
+            continue
+
+        # Якщо це перший запис для ринкової пари, зберігаємо його як початкову ціну
+        if market_pair not in market_pairs:
+            market_pairs[market_pair] = data
+        else:
+            initial_price = market_pairs[market_pair].price
+            price_change = ((data.price - initial_price) / initial_price) * 100
+
+            # Якщо зміна ціни перевищує поріг, додаємо пару у значні зміни
+            if abs(price_change) >= threshold:
+                significant_changes.append({
+                    'market_pair': f"{data.market_pair} ({data.exchange_name})",
+                    'price': data.price,
+                    'change_percentage': price_change,
+                    'timestamp': data.timestamp,
+                    'market_url': data.market_url
+                })
+                processed_market_pairs.add(market_pair)  # Додаємо пару до оброблених
+                # Оскільки зміна знайдена, більше перевірок для цієї пари не потрібно
+                del market_pairs[market_pair]
+
+    # Сортуємо результати за change_percentage
+    significant_changes.sort(key=lambda x: x['change_percentage'])
+
+    return significant_changes
+
+
+# Таблиця market_pairs до розділення на довідник пар і таблицю цін: шість значень на кожен запис
+legacy_market_pairs = Table(
+    'market_pairs_baseline', MetaData(),
+    Column('id', Integer, primary_key=True),
+    Column('market_pair', String(100), index=True),
+    Column('exchange_name', String(50)),
+    Column('category', String(50)),
+    Column('market_url', String(255)),
+    Column('price', Float),
+    Column('timestamp', DateTime)
+)
+
+
+def insert_multi_values(session: Session, table: Table, rows: list[dict]) -> None:
+    """Вставляє всі записи одним запитом INSERT з багатьма VALUES, як save_market_pair_data_bulk до пакетної вставки."""
+    session.execute(insert(table).values(rows))
+    session.commit()
@@ -0,0 +1,75 @@
+"""
+Порівнює save_market_pair_data_bulk (executemany частинами по batch_size) з попереднім підходом —
+одним INSERT з багатьма VALUES — на 500, 5k та 50k записів.
+
+Одиночний INSERT вимірюється як для таблиці цін, так і для широкої таблиці market_pairs до розділення
+на довідник пар: там кожен запис займає шість параметрів, і на 50k записів запит перевищує ліміт
+параметрів SQLite (SQLITE_MAX_VARIABLE_NUMBER, 250000 у поширених збірках).
+
+Запуск з кореня репозиторію (за замовчуванням SQLite у тимчасовому файлі; для MySQL задайте DATABASE_URL):
+    python -m benchmarks.bench_bulk_insert
+
+Увага: таблиці бази даних з DATABASE_URL перестворюються.
+"""
+import os
+import time
+import tempfile
+from datetime import datetime
+
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.gettempdir(), 'marketpulse_bench.db')}")
+
+from loguru import logger  # noqa: E402
+
+import database  # noqa: E402
+import market_data_fetcher  # noqa: E402
+from benchmarks.baseline import insert_multi_values, legacy_market_pairs  # noqa: E402
+
+
+def make_snapshot(rows: int) -> list[dict]:
+    """Знімок з rows ринкових пар у форматі, який отримує save_market_pair_data_bulk."""
+    timestamp = datetime(2026, 1, 1)
+    return [
+        {
+            'market_pair': f'P{index}/USDT',
+            'exchange_name': 'bench',
+            'category': 'spot',
+            'market_url': f'https://coinmarketcap.com/exchanges/bench/markets/{index}',
+            'price': float(index),
+            'timestamp': timestamp
+        }
+        for index in range(rows)
+    ]
+
+
+def run(name: str, rows: int) -> str:
+    """Вставляє знімок одним із підходів у щойно створену схему та повертає час або назву помилки."""
+    database.Base.metadata.drop_all(database.engine)
+    legacy_market_pairs.drop(database.engine, checkfirst=True)
+    database.migrate_schema()
+    legacy_market_pairs.create(database.engine)
+    market_data_fetcher.market_pair_ids.clear()
+    snapshot = make_snapshot(rows)
+
+    with database.SessionLocal() as session:
+        # Довідник пар заповнюється до вимірювання, тож підходи порівнюються лише на вставці цін
+        price_rows = market_data_fetcher.market_pair_ids.resolve(session, snapshot)
+        session.commit()
+        started = time.perf_counter()
+        try:
+            if name == 'multi-values (legacy table)':
+                insert_multi_values(session, legacy_market_pairs, snapshot)
+            elif name == 'multi-values':
+                insert_multi_values(session, database.MarketPairData.__table__, price_rows)
+            else:
+                market_data_fetcher.save_market_pair_data_bulk(session, snapshot)
+        except Exception as e:
+            session.rollback()
+            return f"failed ({type(e).__name__})"
+        return f"{(time.perf_counter() - started) * 1000:.0f} ms"
+
+
+if __name__ == '__main__':
+    logger.remove()
+    for rows in (500, 5000, 50000):
+        results = {name: run(name, rows) for name in ('multi-values (legacy table)', 'multi-values', 'executemany')}
+        print(f"{rows:>6} rows: " + ', '.join(f"{name} {result}" for name, result in results.items()))
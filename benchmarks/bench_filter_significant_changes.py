@@ -0,0 +1,85 @@
+"""
+Порівнює швидкість filter_significant_changes з попередньою реалізацією на вікні 100k+ записів,
+а також обчислення всіх інтервалів звіту біржі так, як це робить generate_reports(): попередня реалізація
+отримує зріз slice_interval() кожного інтервалу, поточна — масиви PriceColumns, побудовані один раз.
+
+Запуск з кореня репозиторію:
+    python -m benchmarks.bench_filter_significant_changes
+"""
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from market_reporter import (  # noqa: E402
+    REPORT_INTERVALS, MarketPairRow, PriceColumns, filter_interval_changes, filter_significant_changes,
+    partition_market_data, slice_interval)
+from benchmarks.baseline import filter_significant_changes as baseline_filter_significant_changes  # noqa: E402
+
+
+def make_window(
+        pairs: int, points: int, volatility: float, seed: int = 0, spacing: timedelta = timedelta(minutes=1)
+) -> list[MarketPairRow]:
+    """Вікно з pairs пар по points записів у порядку (market_pair, timestamp), як його повертає запит."""
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    rows = []
+    for pair in range(pairs):
+        price = rng.uniform(0.001, 100)
+        for point in range(points):
+            if point:
+                price *= 1 + rng.uniform(-volatility, volatility)
+            rows.append(MarketPairRow(f'P{pair}', 'ex', price, start + spacing * point, 'u'))
+    return rows
+
+
+def best_of(func, market_data: list[MarketPairRow], threshold: float, repeat: int = 5) -> float:
+    """Найкращий час з repeat запусків у секундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(market_data, threshold, set())
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def best_of_intervals(func, market_pairs: dict[str, list[MarketPairRow]], threshold: float, repeat: int = 5) -> float:
+    """Найкращий з repeat запусків час обчислення всіх інтервалів звіту біржі у секундах."""
+    end_time = max(rows[-1].timestamp for rows in market_pairs.values())
+    starts = sorted(end_time - length for length in REPORT_INTERVALS.values())
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(market_pairs, starts, threshold, set())
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def baseline_intervals(market_pairs, starts, threshold, processed_market_pairs) -> None:
+    for start_time in starts:
+        baseline_filter_significant_changes(slice_interval(market_pairs, start_time), threshold, processed_market_pairs)
+
+
+def current_intervals(market_pairs, starts, threshold, processed_market_pairs) -> None:
+    columns = PriceColumns(market_pairs)
+    for start_time in starts:
+        filter_interval_changes(columns, start_time, threshold, processed_market_pairs)
+
+
+if __name__ == '__main__':
+    for name, volatility in (('quiet', 0.003), ('volatile', 0.03)):
+        window = make_window(pairs=5000, points=30, volatility=volatility)
+        baseline = best_of(baseline_filter_significant_changes, window, 10.0)
+        current = best_of(filter_significant_changes, window, 10.0)
+        print(f"{name:>8}: {len(window)} rows, baseline {baseline * 1000:.1f} ms, current {current * 1000:.1f} ms")
+
+    # Вікно 3 години з точками кожні 2 хвилини, усі інтервали звіту
+    for name, volatility in (('quiet', 0.003), ('volatile', 0.03)):
+        window = make_window(pairs=2000, points=90, volatility=volatility, spacing=timedelta(minutes=2))
+        market_pairs = partition_market_data(window)['ex']
+        baseline = best_of_intervals(baseline_intervals, market_pairs, 10.0)
+        current = best_of_intervals(current_intervals, market_pairs, 10.0)
+        print(f"{name:>8}: {len(window)} rows, {len(REPORT_INTERVALS)} intervals, "
+              f"baseline {baseline * 1000:.1f} ms, current {current * 1000:.1f} ms")
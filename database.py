@@ -1,7 +1,13 @@
 import os
+from datetime import datetime, timedelta, timezone
 
+from loguru import logger
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, Column, String, Float, DateTime, Integer
+from sqlalchemy import (
+    create_engine, inspect, select, func, text, Column, String, Float, DateTime, Integer, Index, MetaData, Table,
+    UniqueConstraint
+)
+from sqlalchemy.engine import Engine, Connection
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -16,24 +22,255 @@ DATABASE_URL = os.getenv('DATABASE_URL')
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Погодинні секції market_pairs називаються за верхньою межею, остання секція приймає все майбутнє
+PARTITION_NAME_FORMAT = 'p%Y%m%d%H'
+FUTURE_PARTITION = 'pfuture'
 
-# Модель для збереження інформації про ринкові пари
-class MarketPairData(Base):
-    __tablename__ = 'market_pairs'
+
+# Довідник ринкових пар: біржа, категорія та посилання незмінні для пари, тому зберігаються один раз
+class MarketPairInfo(Base):
+    __tablename__ = 'market_pair_info'
+    __table_args__ = (
+        UniqueConstraint('exchange_name', 'market_pair', name='uq_market_pair_info_exchange_pair'),
+    )
 
     id = Column(Integer, primary_key=True)
-    market_pair = Column(String(100), index=True)
-    exchange_name = Column(String(50))
+    exchange_name = Column(String(50), nullable=False)
+    market_pair = Column(String(100), nullable=False)
     category = Column(String(50))
     market_url = Column(String(255))
+
+    def __repr__(self) -> str:
+        return (f"<MarketPairInfo(id={self.id}, exchange_name={self.exchange_name}, "
+                f"market_pair={self.market_pair}, category={self.category})>")
+
+
+# Модель для збереження цін ринкових пар
+class MarketPairData(Base):
+    __tablename__ = 'market_pairs'
+    __table_args__ = (
+        # Вибірка вікна для звітів та видалення старих записів фільтрують за timestamp
+        Index('ix_market_pairs_timestamp', 'timestamp'),
+        # Впорядковане читання історії кожної пари
+        Index('ix_market_pairs_pair_timestamp', 'pair_id', 'timestamp'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    # Посилання на MarketPairInfo.id без зовнішнього ключа: MySQL не підтримує їх у секціонованих таблицях
+    pair_id = Column(Integer, nullable=False)
     price = Column(Float)
     timestamp = Column(DateTime)
 
     def __repr__(self) -> str:
-        return (f"<MarketPairData(market_pair={self.market_pair}, category={self.category}, "
-                f"price={self.price}, timestamp={self.timestamp})>")
+        return f"<MarketPairData(pair_id={self.pair_id}, price={self.price}, timestamp={self.timestamp})>"
+
+
+def migrate_legacy_market_pairs(bind: Engine) -> None:
+    """
+    Переносить дані зі старої таблиці market_pairs, де кожен рядок містив біржу, категорію та посилання,
+    у довідник market_pair_info та вузьку таблицю цін.
+
+    У MySQL CREATE, RENAME та DROP фіксують транзакцію неявно, тому нові таблиці заповнюються поруч зі старою,
+    яка замінюється одним атомарним RENAME TABLE. Перерваний перенос продовжується під час наступного запуску:
+    поки стара таблиця називається market_pairs, копія будується заново, а залишена після заміни
+    market_pairs_legacy видаляється.
+
+    Аргументи:
+        bind (Engine): Підключення до бази даних.
+    """
+    tables = set(inspect(bind).get_table_names())
+
+    if 'market_pairs' not in tables and 'market_pairs_legacy' in tables:
+        # Заміну перервано між двома перейменуваннями (лише бази без атомарного RENAME TABLE)
+        logger.warning("Завершуємо перерване перейменування market_pairs_new на market_pairs")
+        with bind.begin() as connection:
+            connection.execute(text("ALTER TABLE market_pairs_new RENAME TO market_pairs"))
+    elif 'market_pairs' in tables and _is_legacy_market_pairs(bind, 'market_pairs'):
+        _copy_legacy_market_pairs(bind, tables)
+
+    if 'market_pairs_legacy' in set(inspect(bind).get_table_names()):
+        logger.info("Видаляємо market_pairs_legacy після переносу")
+        with bind.begin() as connection:
+            Table('market_pairs_legacy', MetaData()).drop(bind=connection)
+
+
+def _is_legacy_market_pairs(bind: Engine, table_name: str) -> bool:
+    """Стара схема зберігала біржу та пару у кожному рядку цін."""
+    return 'exchange_name' in {column['name'] for column in inspect(bind).get_columns(table_name)}
+
+
+def _copy_legacy_market_pairs(bind: Engine, tables: set[str]) -> None:
+    """Копіює стару market_pairs у довідник і market_pairs_new, після чого підміняє нею market_pairs."""
+    if 'market_pairs_new' in tables:
+        logger.warning("Знайдено market_pairs_new від перерваного переносу, копіюємо дані заново")
+    else:
+        logger.info("Переносимо market_pairs у нормалізовану схему")
+
+    legacy = Table('market_pairs', MetaData(), autoload_with=bind)
+    info = MarketPairInfo.__table__
+    prices = MarketPairData.__table__.to_metadata(MetaData(), name='market_pairs_new')
+    # Індекси створює migrate_schema після заміни: у SQLite їхні імена зайняті старою таблицею,
+    # а вставка у таблицю без індексів швидша
+    prices.indexes.clear()
+
+    prices.drop(bind=bind, checkfirst=True)
+    prices.create(bind=bind)
+    info.create(bind=bind, checkfirst=True)
+
+    with bind.begin() as connection:
+        # Довідник міг частково заповнитися, якщо попередній перенос перервався після фіксації
+        known = select(info.c.id).where(
+            (info.c.exchange_name == legacy.c.exchange_name) & (info.c.market_pair == legacy.c.market_pair)
+        )
+        connection.execute(
+            info.insert().from_select(
+                ['exchange_name', 'market_pair', 'category', 'market_url'],
+                select(
+                    legacy.c.exchange_name,
+                    legacy.c.market_pair,
+                    func.max(legacy.c.category),
+                    func.max(legacy.c.market_url),
+                ).where(~known.exists()).group_by(legacy.c.exchange_name, legacy.c.market_pair)
+            )
+        )
+        connection.execute(
+            prices.insert().from_select(
+                ['pair_id', 'price', 'timestamp'],
+                select(info.c.id, legacy.c.price, legacy.c.timestamp).join(
+                    info,
+                    (info.c.exchange_name == legacy.c.exchange_name) & (info.c.market_pair == legacy.c.market_pair)
+                )
+            )
+        )
+
+    with bind.begin() as connection:
+        if connection.dialect.name == 'mysql':
+            connection.execute(text(
+                "RENAME TABLE market_pairs TO market_pairs_legacy, market_pairs_new TO market_pairs"
+            ))
+        else:
+            connection.execute(text("ALTER TABLE market_pairs RENAME TO market_pairs_legacy"))
+            connection.execute(text("ALTER TABLE market_pairs_new RENAME TO market_pairs"))
+
+
+def get_partitions(connection: Connection) -> list[str]:
+    """
+    Повертає імена погодинних секцій таблиці market_pairs у порядку зростання межі.
+    Для несекціонованої таблиці або бази, відмінної від MySQL, повертає порожній список.
+    """
+    if connection.dialect.name != 'mysql':
+        return []
+
+    result = connection.execute(text(
+        "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'market_pairs' AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION"
+    ))
+    return [name for name in result.scalars() if name != FUTURE_PARTITION]
+
+
+def partition_upper_bound(name: str) -> datetime:
+    """Повертає верхню межу (наївний UTC) погодинної секції за її іменем."""
+    return datetime.strptime(name, PARTITION_NAME_FORMAT)
+
+
+def _partition_definitions(upper_bounds: list[datetime]) -> str:
+    """Формує SQL-опис погодинних секцій та секції для майбутніх записів."""
+    definitions = [
+        f"PARTITION {bound.strftime(PARTITION_NAME_FORMAT)} "
+        f"VALUES LESS THAN (TO_SECONDS('{bound:%Y-%m-%d %H:%M:%S}'))"
+        for bound in upper_bounds
+    ]
+    definitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE")
+    return ', '.join(definitions)
+
+
+def _hourly_bounds(after: datetime, hours_ahead: int) -> list[datetime]:
+    """Повертає межі годин після after до поточної години + hours_ahead включно."""
+    current_hour = datetime.now(timezone.utc).replace(tzinfo=None, minute=0, second=0, microsecond=0)
+    bound = after.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    bounds = []
+    while bound <= current_hour + timedelta(hours=max(1, hours_ahead)):
+        bounds.append(bound)
+        bound += timedelta(hours=1)
+    return bounds
+
+
+def partition_market_pairs(connection: Connection, hours_ahead: int = 24) -> None:
+    """
+    Переводить таблицю market_pairs на погодинне секціонування за timestamp (лише MySQL).
+    Усі наявні записи потрапляють у першу секцію, яка закінчується з початком наступної години.
+    MySQL вимагає, щоб первинний ключ містив колонку секціонування, тому ключ стає (id, timestamp).
+
+    Аргументи:
+        connection (Connection): З'єднання з базою даних.
+        hours_ahead (int): На скільки годин наперед створюються секції.
+    """
+    if connection.dialect.name != 'mysql':
+        logger.warning("Секціонування market_pairs підтримується лише для MySQL")
+        return
+
+    if get_partitions(connection):
+        return
+
+    logger.info("Секціонуємо market_pairs погодинно")
+    upper_bounds = _hourly_bounds(datetime.now(timezone.utc).replace(tzinfo=None), hours_ahead)
+    connection.execute(text(
+        f"ALTER TABLE market_pairs DROP PRIMARY KEY, ADD PRIMARY KEY (id, timestamp) "
+        f"PARTITION BY RANGE (TO_SECONDS(timestamp)) ({_partition_definitions(upper_bounds)})"
+    ))
+
+
+def add_future_partitions(connection: Connection, hours_ahead: int = 24) -> int:
+    """
+    Додає погодинні секції market_pairs до поточної години + hours_ahead, розділяючи секцію майбутніх записів.
+
+    Аргументи:
+        connection (Connection): З'єднання з базою даних.
+        hours_ahead (int): На скільки годин наперед мають існувати секції.
+
+    Повертає:
+        int: Кількість створених секцій.
+    """
+    partitions = get_partitions(connection)
+    if not partitions:
+        return 0
+
+    upper_bounds = _hourly_bounds(partition_upper_bound(partitions[-1]), hours_ahead)
+    if upper_bounds:
+        connection.execute(text(
+            f"ALTER TABLE market_pairs REORGANIZE PARTITION {FUTURE_PARTITION} "
+            f"INTO ({_partition_definitions(upper_bounds)})"
+        ))
+    return len(upper_bounds)
+
+
+def migrate_schema(bind: Engine = engine, partitioned: bool = False) -> None:
+    """
+    Створює відсутні таблиці та індекси, щоб наявні розгортання оновлювали схему без втрати даних.
+    Таблиця market_pairs у старому форматі переноситься у нормалізовану схему.
+
+    Аргументи:
+        bind (Engine): Підключення до бази даних.
+        partitioned (bool): Переводить market_pairs на погодинне секціонування, якщо True.
+    """
+    migrate_legacy_market_pairs(bind)
+
+    Base.metadata.create_all(bind=bind)
+
+    inspector = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                logger.info("Створюємо індекс {index} для таблиці {table}", index=index.name, table=table.name)
+                index.create(bind=bind)
+
+    if partitioned:
+        with bind.begin() as connection:
+            partition_market_pairs(connection)
 
 
 if __name__ == '__main__':
-    # Створення таблиці у базі даних
-    Base.metadata.create_all(bind=engine)
+    # Створення та оновлення таблиць у базі даних
+    migrate_schema()
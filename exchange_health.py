@@ -0,0 +1,133 @@
+import os
+import sys
+import time
+from threading import Lock
+from typing import Collection, Optional
+
+from loguru import logger
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger.remove()
+logger.add(sys.stdout, colorize=True)
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+
+class ExchangeBreaker:
+    """Стан запобіжника однієї біржі."""
+    __slots__ = ('state', 'failures', 'trips', 'retry_at', 'last_success', 'exchange_names')
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.retry_at = 0.0
+        self.last_success: Optional[float] = None
+        self.exchange_names: set[str] = set()
+
+
+class ExchangeHealth:
+    """
+    Запобіжник (circuit breaker) запитів до API для кожної біржі та визначення бірж із застарілими даними.
+
+    Після failure_threshold невдалих запитів поспіль запобіжник розмикається, і запити до біржі пропускаються
+    на base_backoff секунд, з кожним наступним розмиканням удвічі довше, але не довше за max_backoff.
+    Після паузи пропускається один пробний запит (half-open): успіх замикає запобіжник, невдача розмикає знову.
+    Біржа вважається застарілою, якщо останній успішний знімок старший за stale_after секунд.
+    """
+
+    def __init__(
+            self, failure_threshold: int = 3, base_backoff: float = 60.0, max_backoff: float = 3600.0,
+            stale_after: float = 1800.0):
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.stale_after = stale_after
+        self._breakers: dict[str, ExchangeBreaker] = {}
+        self._lock = Lock()
+
+    def allow(self, exchange: str) -> bool:
+        """Чи можна зараз робити запит до біржі; після паузи переводить запобіжник у пробний стан."""
+        with self._lock:
+            breaker = self._breakers.setdefault(exchange, ExchangeBreaker())
+            # Пробу, що не завершилася ні успіхом, ні невдачею, повторюємо через base_backoff
+            if breaker.state != CLOSED and time.time() >= breaker.retry_at:
+                breaker.state = HALF_OPEN
+                breaker.retry_at = time.time() + self.base_backoff
+                logger.info(f"Circuit for {exchange} is half-open, probing")
+                return True
+            return breaker.state == CLOSED
+
+    def record_success(self, exchange: str, exchange_names: Collection[str]) -> None:
+        """
+        Замикає запобіжник після успішного знімка.
+
+        Аргументи:
+            exchange (str): Назва біржі в API.
+            exchange_names (Collection[str]): Назви біржі у знімку (ключі звітів).
+        """
+        with self._lock:
+            breaker = self._breakers.setdefault(exchange, ExchangeBreaker())
+            if breaker.state != CLOSED:
+                logger.success(f"Circuit for {exchange} closed")
+            breaker.state = CLOSED
+            breaker.failures = breaker.trips = 0
+            breaker.last_success = time.time()
+            breaker.exchange_names = set(exchange_names)
+
+    def record_failure(self, exchange: str) -> None:
+        """Враховує невдалий запит і розмикає запобіжник після failure_threshold невдач або невдалої проби."""
+        with self._lock:
+            self._fail(exchange, self._breakers.setdefault(exchange, ExchangeBreaker()))
+
+    def record_degraded(self, exchange: str, exchange_names: Collection[str]) -> None:
+        """
+        Враховує неповний знімок: отримані дані свіжі, але запит вважається невдалим для запобіжника,
+        тож біржа, що постійно віддає частину сторінок, не витрачає бюджет запитів без обмежень.
+
+        Аргументи:
+            exchange (str): Назва біржі в API.
+            exchange_names (Collection[str]): Назви біржі у знімку (ключі звітів).
+        """
+        with self._lock:
+            breaker = self._breakers.setdefault(exchange, ExchangeBreaker())
+            breaker.last_success = time.time()
+            breaker.exchange_names = set(exchange_names)
+            self._fail(exchange, breaker)
+
+    def _fail(self, exchange: str, breaker: ExchangeBreaker) -> None:
+        """Збільшує лічильник невдач і за потреби розмикає запобіжник; викликається під блокуванням."""
+        breaker.failures += 1
+        if breaker.state == HALF_OPEN or breaker.failures >= self.failure_threshold:
+            breaker.trips += 1
+            backoff = min(self.max_backoff, self.base_backoff * 2 ** (breaker.trips - 1))
+            breaker.state = OPEN
+            breaker.retry_at = time.time() + backoff
+            logger.warning(f"Circuit for {exchange} opened for {backoff:.0f} s after {breaker.failures} failures")
+
+    def stale_exchanges(self) -> dict[str, float]:
+        """
+        Повертає біржі із застарілими даними серед тих, що хоч раз успішно відповіли.
+
+        Повертає:
+            dict[str, float]: Назва біржі у звітах -> час останнього успішного знімка (секунди епохи).
+        """
+        now = time.time()
+        with self._lock:
+            return {
+                exchange_name: breaker.last_success
+                for breaker in self._breakers.values()
+                if breaker.exchange_names and now - breaker.last_success > self.stale_after
+                for exchange_name in breaker.exchange_names
+            }
+
+
+# Спільний для потоків процесу стан запобіжників бірж
+exchange_health = ExchangeHealth(
+    failure_threshold=int(os.getenv('BREAKER_FAILURES', 3)),
+    base_backoff=float(os.getenv('BREAKER_BASE_BACKOFF', 60)),
+    max_backoff=float(os.getenv('BREAKER_MAX_BACKOFF', 3600)),
+    stale_after=float(os.getenv('STALE_AFTER', 1800))
+)
@@ -0,0 +1,92 @@
+import math
+from threading import Lock
+from typing import Collection, Optional
+
+import numpy as np
+
+from price_window import PriceSeries, PriceWindowStore, price_window
+
+
+class FetchCadence:
+    """
+    Адаптивний інтервал опитування кожної біржі за розкидом змін цін в останньому знімку.
+
+    Після кожного знімка обчислюється стандартне відхилення логарифмічних змін цін пар біржі, приведене
+    до базового інтервалу (зміна за довший проміжок природно більша), і згладжується експоненційно.
+    Інтервал обернено пропорційний розкиду: при розкиді reference біржа опитується раз на base_interval,
+    при вдвічі більшому — вдвічі частіше, в межах [min_interval, max_interval]. Якщо сумарна частота
+    опитування всіх бірж перевищує request_budget запитів на годину, усі інтервали пропорційно збільшуються,
+    але не понад max_interval: він обмежує проміжок між знімками біржі, на який розраховані звіти.
+    """
+
+    def __init__(
+            self, exchanges: Collection[str], base_interval: float, min_interval: float, max_interval: float,
+            request_budget: Optional[float] = None, reference: float = 0.005, smoothing: float = 0.5,
+            store: PriceWindowStore = price_window):
+        self.exchanges = list(exchanges)
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        # За замовчуванням бюджет відповідає опитуванню всіх бірж з базовим інтервалом
+        self.request_budget = request_budget or len(self.exchanges) * 3600 / base_interval
+        self.reference = reference
+        self.smoothing = smoothing
+        self.store = store
+        self._dispersion: dict[str, float] = {}
+        self._lock = Lock()
+
+    def record(self, exchange: str, exchange_names: Collection[str]) -> None:
+        """
+        Оновлює розкид змін цін біржі після збереження її знімка.
+
+        Аргументи:
+            exchange (str): Назва біржі в API, для якої плануються запити.
+            exchange_names (Collection[str]): Назви біржі у знімку (ключі сховища цін).
+        """
+        if not exchange_names:
+            return
+
+        dispersion = self.store.read(lambda series_map: self._snapshot_dispersion(series_map, exchange_names))
+        if dispersion is None:
+            return
+
+        with self._lock:
+            previous = self._dispersion.get(exchange)
+            if previous is not None:
+                dispersion = self.smoothing * dispersion + (1 - self.smoothing) * previous
+            self._dispersion[exchange] = dispersion
+
+    def interval(self, exchange: str) -> float:
+        """Повертає інтервал у секундах до наступного опитування біржі."""
+        with self._lock:
+            intervals = {name: self._desired_interval(name) for name in self.exchanges}
+
+        rate = sum(3600 / value for value in intervals.values())
+        scale = max(1.0, rate / self.request_budget)
+        return min(self.max_interval, intervals.get(exchange, self._desired_interval(exchange)) * scale)
+
+    def _desired_interval(self, exchange: str) -> float:
+        """Інтервал біржі за її розкидом без урахування бюджету; без даних — базовий інтервал."""
+        dispersion = self._dispersion.get(exchange)
+        if dispersion is None:
+            return self.base_interval
+        if dispersion <= 0:
+            return self.max_interval
+        interval = self.base_interval * self.reference / dispersion
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def _snapshot_dispersion(
+            self, series_map: dict[tuple[str, str], PriceSeries], exchange_names: Collection[str]) -> Optional[float]:
+        """Стандартне відхилення змін цін між двома останніми точками пар, приведене до base_interval."""
+        returns = []
+        for (exchange_name, _), series in series_map.items():
+            if exchange_name not in exchange_names or len(series) < 2:
+                continue
+            previous_price, price = series.prices[-2], series.prices[-1]
+            elapsed = series.timestamps[-1] - series.timestamps[-2]
+            if previous_price > 0 and price > 0 and elapsed > 0:
+                returns.append(math.log(price / previous_price) * math.sqrt(self.base_interval / elapsed))
+
+        if len(returns) < 2:
+            return None
+        return float(np.std(returns))
@@ -0,0 +1,146 @@
+import os
+import random
+from typing import Iterator, Optional
+from urllib.parse import urlsplit
+from contextlib import contextmanager
+from threading import BoundedSemaphore, Lock
+
+import requests
+from dotenv import load_dotenv
+from urllib3.util.retry import Retry
+from fake_useragent import UserAgent, FakeUserAgentError
+from requests.adapters import HTTPAdapter
+
+load_dotenv()
+
+# Таймаути (з'єднання, читання) у секундах для всіх запитів
+HTTP_TIMEOUT = (float(os.getenv('HTTP_CONNECT_TIMEOUT', 5)), float(os.getenv('HTTP_READ_TIMEOUT', 30)))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 3))
+HTTP_BACKOFF = float(os.getenv('HTTP_BACKOFF', 1.0))
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 10))
+
+# 429 не повторюється: обмеження частоти обробляє запобіжник біржі, не утримуючи слот хоста на час паузи
+RETRY_STATUSES = (500, 502, 503, 504)
+
+# User-Agent на випадок, якщо набір даних fake_useragent недоступний
+DEFAULT_USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/128.0.0.0 Safari/537.36'
+)
+
+
+class HostConcurrencyLimiter:
+    """Обмежує кількість одночасних запитів до кожного хоста."""
+
+    def __init__(self, limit: int = 1):
+        self.limit = limit
+        self._semaphores: dict[str, BoundedSemaphore] = {}
+        self._lock = Lock()
+
+    def set_limit(self, limit: int) -> None:
+        """Змінює ліміт; діє для хостів, до яких ще не було запитів з попереднім лімітом."""
+        with self._lock:
+            if limit != self.limit:
+                self.limit = limit
+                self._semaphores.clear()
+
+    @contextmanager
+    def acquire(self, url: str) -> Iterator[None]:
+        """Утримує слот хоста з URL на час виконання запиту."""
+        host = urlsplit(url).netloc
+        with self._lock:
+            semaphore = self._semaphores.setdefault(host, BoundedSemaphore(max(1, self.limit)))
+        with semaphore:
+            yield
+
+
+class UserAgentProvider:
+    """
+    Видає випадковий User-Agent з пулу в пам'яті.
+
+    Пул формується один раз при першому зверненні: із закріпленого списку, якщо він заданий,
+    або з набору даних fake_useragent. Після цього набір даних більше не використовується.
+    """
+
+    def __init__(self, pinned: Optional[list[str]] = None, pool_size: int = 50):
+        self.pinned = pinned or []
+        self.pool_size = pool_size
+        self._pool: Optional[list[str]] = None
+        self._lock = Lock()
+
+    def _load_pool(self) -> list[str]:
+        """Формує пул User-Agent, якщо його ще не сформовано."""
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = self.pinned or self._sample_dataset()
+        return self._pool
+
+    def _sample_dataset(self) -> list[str]:
+        """Вибирає pool_size унікальних User-Agent з набору даних fake_useragent."""
+        try:
+            ua = UserAgent()
+            return list({ua.random for _ in range(self.pool_size)})
+        except FakeUserAgentError:
+            return [DEFAULT_USER_AGENT]
+
+    def get(self) -> str:
+        """Повертає випадковий User-Agent з пулу."""
+        return random.choice(self._load_pool())
+
+
+def create_http_session() -> requests.Session:
+    """
+    Створює сесію з пулом keep-alive з'єднань і політиками повторів.
+
+    GET-запити до API повторюються при помилках з'єднання та статусах 5xx з експоненційною затримкою.
+    Заголовок Retry-After ігнорується: urllib3 чекав би весь зазначений час без обмеження, утримуючи потік.
+    Для Telegram (POST) повторюються лише невдалі з'єднання: повтори після надісланого запиту могли б
+    дублювати повідомлення, а 429/5xx обробляє черга доставки з затримкою, яку повідомляє Telegram.
+    """
+    session = requests.Session()
+
+    api_retry = Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({'GET'}),
+        raise_on_status=False,
+        respect_retry_after_header=False,
+    )
+    telegram_retry = Retry(
+        total=HTTP_RETRIES,
+        read=0,
+        backoff_factor=HTTP_BACKOFF,
+        allowed_methods=frozenset({'POST'}),
+        raise_on_status=False,
+        respect_retry_after_header=False,
+    )
+
+    session.mount('https://', HTTPAdapter(
+        pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=api_retry))
+    session.mount('https://api.telegram.org', HTTPAdapter(
+        pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=telegram_retry))
+
+    return session
+
+
+# Спільні для всього процесу сесія та обмежувач запитів
+http_session = create_http_session()
+host_limiter = HostConcurrencyLimiter()
+user_agents = UserAgentProvider(
+    pinned=[agent.strip() for agent in os.getenv('USER_AGENTS', '').split('|') if agent.strip()],
+    pool_size=int(os.getenv('USER_AGENT_POOL_SIZE', 50))
+)
+
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    """Виконує GET-запит через спільну сесію з таймаутом за замовчуванням."""
+    kwargs.setdefault('timeout', HTTP_TIMEOUT)
+    return http_session.get(url, **kwargs)
+
+
+def http_post(url: str, **kwargs) -> requests.Response:
+    """Виконує POST-запит через спільну сесію з таймаутом за замовчуванням."""
+    kwargs.setdefault('timeout', HTTP_TIMEOUT)
+    return http_session.post(url, **kwargs)
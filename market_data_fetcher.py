@@ -1,27 +1,63 @@
 import os
 import sys
-import json
 import time
 import random
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 from datetime import datetime
+from threading import Event, Lock
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 
 import requests
-from requests import get
 from loguru import logger
-from sqlalchemy import insert
+from sqlalchemy import insert, select, update, bindparam
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session
-from fake_useragent import UserAgent
 from pydantic import BaseModel, ValidationError
 
-from database import SessionLocal, MarketPairData
+from database import SessionLocal, MarketPairData, MarketPairInfo
+from http_client import HTTP_BACKOFF, http_get, host_limiter, user_agents
+from price_window import price_window, to_epoch
+from snapshot_events import snapshot_events
+from exchange_health import exchange_health
+from metrics import (
+    FETCH_DEGRADED, FETCH_PAYLOAD_BYTES, FETCH_SECONDS, INSERT_ROWS, INSERT_ROWS_PER_SECOND, INSERT_SECONDS,
+    VALIDATION_SECONDS
+)
 
 load_dotenv()
 
 logger.remove()
 logger.add(sys.stdout, colorize=True)
 
+# Як часто очікування результатів пулу потоків перевіряє сигнал зупинки, у секундах
+STOP_POLL_INTERVAL = 0.5
+
+
+def pause(seconds: float, stop: Optional[Event] = None) -> bool:
+    """Чекає seconds секунд або до сигналу stop; повертає True, якщо надійшов сигнал зупинки."""
+    if stop is None:
+        time.sleep(seconds)
+        return False
+    return stop.wait(seconds)
+
+
+def iter_completed(
+        executor: ThreadPoolExecutor, futures: Iterable[Future], stop: Optional[Event] = None) -> Iterator[Future]:
+    """
+    Видає future пулу в порядку завершення та закриває пул. Після сигналу stop задачі, що ще не почалися,
+    скасовуються, а на ті, що виконуються, пул не чекає, щоб не затримувати зупинку процесу.
+    """
+    pending = set(futures)
+    try:
+        while pending:
+            if stop is not None and stop.is_set():
+                logger.warning("Зупинка: {count} задач пулу не дочекалися завершення", count=len(pending))
+                return
+            done, pending = wait(pending, timeout=STOP_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            yield from done
+    finally:
+        executor.shutdown(wait=not pending, cancel_futures=bool(pending))
+
 
 class MarketPairQuote(BaseModel):
     id: str
@@ -98,50 +134,83 @@ class ResponseData(BaseModel):
     status: Status
 
 
-def fetch_exchange_market_data(coin_limit: int, exchange: str, save: bool = False) -> ResponseData | bool:
+class MarketPairLite(BaseModel):
+    """Лише ті поля ринкової пари, які зберігаються у базу даних."""
+    exchangeName: str
+    marketPair: str
+    category: str
+    marketUrl: str
+    price: float
+
+
+class ExchangeDataLite(BaseModel):
+    numMarketPairs: Optional[int] = None
+    marketPairs: list[MarketPairLite]
+
+
+class StatusLite(BaseModel):
+    timestamp: datetime
+
+
+class ResponseDataLite(BaseModel):
+    """Полегшена модель відповіді API, що валідує лише потрібні для збереження поля."""
+    data: ExchangeDataLite
+    status: StatusLite
+
+
+def fetch_exchange_market_data(
+        coin_limit: int, exchange: str, save: bool = False,
+        start: int = 1) -> ResponseData | ResponseDataLite | bool | None:
     """
     Робимо запит до API CoinMarketCap для отримання інформації про монети на біржі та зберігаємо її в JSON файл.
+    У робочому режимі відповідь валідується полегшеною моделлю ResponseDataLite,
+    повна модель ResponseData використовується лише разом зі збереженням відповіді у файл.
 
     Аргументи:
         coin_limit (int): Кількість монет для запиту.
         exchange (str): Назва біржі для отримання даних.
         save (bool): Зберігає відповідь у JSON файл, якщо True.
+        start (int): Позиція першої ринкової пари у списку біржі (починаючи з 1).
 
     Повертає:
-        ResponseData або False: Якщо запит вдалий, повертається об'єкт ResponseData.
-        У разі помилки або відсутності відповіді — повертається False.
+        ResponseData, ResponseDataLite, False або None: Якщо запит вдалий, повертається валідований об'єкт відповіді.
+        У разі помилки або відсутності відповіді — повертається False; якщо відповідь отримано, але вона
+        не пройшла валідацію, — None.
     """
     api_url: str = (
         f"https://api.coinmarketcap.com/data-api/v3/"
         f"exchange/market-pairs/latest"
         f"?slug={exchange}"
         f"&category=spot"
-        f"&start=1"
+        f"&start={start}"
         f"&limit={coin_limit}"
     )
 
-    ua: UserAgent = UserAgent()
     logger.debug("Формуємо URL запиту: {url}", url=api_url)
 
     try:
-        response = get(api_url, headers={'User-Agent': ua.random})
+        with host_limiter.acquire(api_url), FETCH_SECONDS.labels(exchange).time():
+            response = http_get(api_url, headers={'User-Agent': user_agents.get()})
         logger.success("Запит до API виконано зі статусом {status_code}", status_code=response.status_code)
 
         if response.status_code == 200:
-            response_json = response.json()
-            logger.success("Отримано валідну відповідь від API CoinMarketCap")
+            logger.success("Отримано відповідь від API CoinMarketCap розміром {size} байт", size=len(response.content))
+            FETCH_PAYLOAD_BYTES.labels(exchange).observe(len(response.content))
 
             if save:
-                save_response_to_file(response_json)
+                save_response_to_file(response.content)
 
             try:
-                data = ResponseData(**response_json)
+                # Сирі байти відповіді валідуються pydantic-core без проміжного дерева словників
+                response_model = ResponseData if save else ResponseDataLite
+                with VALIDATION_SECONDS.labels(response_model.__name__).time():
+                    data = response_model.model_validate_json(response.content)
                 logger.success("Дані успішно валідовані за допомогою Pydantic")
                 return data
 
             except ValidationError as e:
                 logger.error("Помилка валідації даних: {error}", error=e)
-                return False
+                return None
 
         else:
             logger.warning("Помилка при підключенні до API, статус код - {status_code}",
@@ -152,65 +221,443 @@ def fetch_exchange_market_data(coin_limit: int, exchange: str, save: bool = Fals
         logger.error("Помилка з'єднання з API.")
         return False
 
+    except requests.exceptions.Timeout:
+        logger.error("Перевищено час очікування відповіді від API.")
+        return False
+
+
+def fetch_exchange_page(
+        page_size: int, exchange: str, start: int, retries: int = 2, save: bool = False,
+        stop: Optional[Event] = None) -> ResponseData | ResponseDataLite | bool:
+    """
+    Отримує одну сторінку ринкових пар біржі, повторюючи запит з експоненційною затримкою, якщо відповідь
+    не пройшла валідацію. Помилки з'єднання та статуси 5xx вже повторює http_client, тож сторінка з такою
+    помилкою одразу вважається неотриманою.
+
+    Аргументи:
+        page_size (int): Кількість ринкових пар на сторінці.
+        exchange (str): Назва біржі для отримання даних.
+        start (int): Позиція першої ринкової пари сторінки (починаючи з 1).
+        retries (int): Кількість повторних спроб після відповіді, що не пройшла валідацію.
+        save (bool): Зберігає відповідь у JSON файл, якщо True.
+        stop (Event, optional): Сигнал зупинки, що перериває очікування перед повтором.
+
+    Повертає:
+        ResponseData, ResponseDataLite або False: Валідована сторінка або False, якщо її не отримано.
+    """
+    for attempt in range(retries + 1):
+        if attempt:
+            if pause(HTTP_BACKOFF * 2 ** (attempt - 1), stop):
+                return False
+            logger.warning("Повторний запит сторінки {start} біржі {exchange}", start=start, exchange=exchange)
+
+        page = fetch_exchange_market_data(coin_limit=page_size, exchange=exchange, save=save, start=start)
+        if page is not None:
+            return page
+
+    return False
+
+
+def fetch_exchange_market_data_paged(
+        coin_limit: int, exchange: str, page_size: int, retries: int = 2, save: bool = False,
+        stop: Optional[Event] = None) -> tuple[ResponseData | ResponseDataLite | bool, int]:
+    """
+    Отримує до coin_limit ринкових пар біржі сторінками по page_size.
+    Перша сторінка визначає загальну кількість пар (numMarketPairs), решта запитується паралельно;
+    кількість одночасних запитів обмежує host_limiter. Кожна сторінка повторюється окремо (fetch_exchange_page).
+    Сторінки об'єднуються в один знімок з часом першої сторінки, пари, що через зміну порядку
+    потрапили на дві сторінки, залишаються один раз. У файл (save=True) зберігається лише перша сторінка.
+
+    Аргументи:
+        coin_limit (int): Максимальна кількість ринкових пар.
+        exchange (str): Назва біржі для отримання даних.
+        page_size (int): Кількість ринкових пар на сторінці.
+        retries (int): Кількість повторних спроб для кожної сторінки.
+        save (bool): Зберігає відповідь у JSON файл, якщо True.
+        stop (Event, optional): Сигнал зупинки: сторінки, що ще не запитані, пропускаються.
 
-def save_response_to_file(response_json: dict) -> None:
+    Повертає:
+        tuple: Об'єднаний знімок (False, якщо не вдалося отримати першу сторінку) та кількість неотриманих сторінок.
+    """
+    first_page = fetch_exchange_page(
+        min(page_size, coin_limit), exchange, start=1, retries=retries, save=save, stop=stop)
+    if not first_page:
+        return False, 0
+
+    total = min(coin_limit, first_page.data.numMarketPairs or coin_limit)
+    starts = list(range(1 + page_size, total + 1, page_size))
+    pages = [first_page]
+
+    if starts:
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(host_limiter.limit, len(starts))), thread_name_prefix=f'page-{exchange}')
+        futures = {
+            executor.submit(
+                fetch_exchange_page, min(page_size, total - start + 1), exchange, start, retries, stop=stop
+            ): start
+            for start in starts
+        }
+        results = {futures[future]: future.result() for future in iter_completed(executor, futures, stop)}
+        for start in starts:
+            if results.get(start):
+                pages.append(results[start])
+            else:
+                logger.error("Сторінку {start} біржі {exchange} не отримано, знімок неповний",
+                             start=start, exchange=exchange)
+
+    seen = set()
+    market_pairs = []
+    for page in pages:
+        for row in page.data.marketPairs:
+            key = (row.exchangeName, row.marketPair)
+            if key not in seen:
+                seen.add(key)
+                market_pairs.append(row)
+
+    logger.success("Отримано {count} ринкових пар біржі {exchange} з {pages} сторінок",
+                   count=len(market_pairs), exchange=exchange, pages=len(pages))
+    snapshot = first_page.model_copy(update={'data': first_page.data.model_copy(update={'marketPairs': market_pairs})})
+    return snapshot, len(starts) + 1 - len(pages)
+
+
+def save_response_to_file(response_content: bytes) -> None:
     """
-    Зберігає відповідь API у JSON файл.
+    Зберігає відповідь API у JSON файл у тому вигляді, в якому її повернув сервер.
 
     Аргументи:
-        response_json (dict): Відповідь API у форматі словника.
+        response_content (bytes): Сирий вміст відповіді API.
     """
-    with open('coin_info.json', 'w', encoding='utf8') as file:
-        json.dump(response_json, file, ensure_ascii=False, indent=4)
+    with open('coin_info.json', 'wb') as file:
+        file.write(response_content)
     logger.info("Відповідь API збережена у 'coin_info.json'")
 
 
-def save_market_pair_data_bulk(session: Session, market_pairs_list: list[dict]) -> None:
+class MarketPairIdCache:
+    """
+    Кеш довідника ринкових пар у пам'яті процесу: (exchange_name, market_pair) -> (id, category, market_url).
+    До бази даних звертається лише для нових пар або пар, у яких змінилися категорія чи посилання.
+    """
+
+    def __init__(self):
+        self._entries: dict[tuple[str, str], tuple[int, str, str]] = {}
+        self._lock = Lock()
+
+    def resolve(self, session: Session, market_pairs_list: list[dict]) -> list[dict]:
+        """
+        Перетворює записи про ринкові пари на рядки таблиці цін з ідентифікатором пари з довідника.
+
+        Аргументи:
+            session (Session): Сесія бази даних.
+            market_pairs_list (list[dict]): Список словників з інформацією про ринкові пари.
+
+        Повертає:
+            list[dict]: Рядки з ключами pair_id, price та timestamp.
+        """
+        with self._lock:
+            unresolved = {}
+            for row in market_pairs_list:
+                key = (row['exchange_name'], row['market_pair'])
+                entry = self._entries.get(key)
+                if entry is None or entry[1:] != (row['category'], row['market_url']):
+                    unresolved[key] = row
+
+            if unresolved:
+                self._sync(session, unresolved)
+
+            return [
+                {
+                    'pair_id': self._entries[(row['exchange_name'], row['market_pair'])][0],
+                    'price': row['price'],
+                    'timestamp': row['timestamp']
+                }
+                for row in market_pairs_list
+            ]
+
+    def clear(self) -> None:
+        """Очищає кеш, наприклад після відкату транзакції, у якій довідник було змінено."""
+        with self._lock:
+            self._entries.clear()
+
+    def _sync(self, session: Session, rows: dict[tuple[str, str], dict]) -> None:
+        """
+        Додає у довідник нові пари, оновлює змінені та заносить їхні ідентифікатори у кеш.
+        Зміни довідника не фіксуються тут, а входять у транзакцію сесії, яку фіксує або відкочує викликач.
+        """
+        info = MarketPairInfo.__table__
+        known = self._select(session, rows)
+
+        new_rows = [
+            {
+                'exchange_name': exchange_name,
+                'market_pair': market_pair,
+                'category': row['category'],
+                'market_url': row['market_url']
+            }
+            for (exchange_name, market_pair), row in rows.items() if (exchange_name, market_pair) not in known
+        ]
+        changed_rows = [
+            {'pair_id': known[key], 'new_category': row['category'], 'new_market_url': row['market_url']}
+            for key, row in rows.items() if key in known
+        ]
+
+        if new_rows:
+            session.execute(insert(info), new_rows)
+        if changed_rows:
+            session.execute(
+                update(info)
+                .where(info.c.id == bindparam('pair_id'))
+                .values(category=bindparam('new_category'), market_url=bindparam('new_market_url')),
+                changed_rows
+            )
+        if new_rows:
+            known.update(self._select(session, rows))
+
+        for key, row in rows.items():
+            self._entries[key] = (known[key], row['category'], row['market_url'])
+
+    @staticmethod
+    def _select(session: Session, rows: dict[tuple[str, str], dict]) -> dict[tuple[str, str], int]:
+        """Вибирає ідентифікатори наявних у довіднику пар."""
+        info = MarketPairInfo.__table__
+        result = session.execute(
+            select(info.c.id, info.c.exchange_name, info.c.market_pair)
+            .where(info.c.exchange_name.in_({key[0] for key in rows}), info.c.market_pair.in_({key[1] for key in rows}))
+        )
+        return {
+            (exchange_name, market_pair): pair_id
+            for pair_id, exchange_name, market_pair in result if (exchange_name, market_pair) in rows
+        }
+
+
+# Спільний для всіх потоків кеш довідника ринкових пар
+market_pair_ids = MarketPairIdCache()
+
+
+class StoredPriceCache:
+    """
+    Остання збережена у базу ціна кожної пари (exchange_name, market_pair) для дельта-запису.
+
+    Зі знімка записуються лише пари, ціна яких змінилася з останнього збереження. Раз на keyframe_interval
+    секунд біржа записується повністю (опорний знімок). Опорним стає перший знімок, зроблений щонайменше через
+    keyframe_interval після попереднього опорного, тож опорні знімки віддалені не більше ніж на keyframe_interval
+    плюс найдовший проміжок між знімками біржі. Саме за стільки до моменту t треба шукати останню збережену
+    точку, щоб відновити ціну пари в момент t. Перший знімок біржі після запуску процесу завжди опорний.
+    """
+
+    def __init__(self):
+        self._prices: dict[tuple[str, str], float] = {}
+        self._keyframes: dict[str, float] = {}
+        self._lock = Lock()
+
+    def changes(
+            self, market_pairs_list: list[dict], keyframe_interval: float,
+            complete: bool = True) -> tuple[list[dict], bool]:
+        """
+        Вибирає записи знімка, які потрібно зберегти.
+        Неповний знімок (complete=False), коли настав час опорного, записується весь, але опорним не вважається,
+        тож опорним стане наступний повний знімок.
+
+        Аргументи:
+            market_pairs_list (list[dict]): Список словників з інформацією про ринкові пари.
+            keyframe_interval (float): Інтервал між опорними знімками біржі у секундах.
+            complete (bool): Чи отримано всі сторінки знімка.
+
+        Повертає:
+            tuple[list[dict], bool]: Записи для збереження та ознака опорного знімка.
+        """
+        # Порожній список пар — коректна відповідь API: зберігати нічого, опорний знімок не настає
+        if not market_pairs_list:
+            return [], False
+
+        with self._lock:
+            timestamp = max(to_epoch(row['timestamp']) for row in market_pairs_list)
+            keyframe = any(
+                timestamp - self._keyframes.get(row['exchange_name'], float('-inf')) >= keyframe_interval
+                for row in market_pairs_list
+            )
+            if keyframe:
+                return market_pairs_list, complete
+
+            return [
+                row for row in market_pairs_list
+                if self._prices.get((row['exchange_name'], row['market_pair'])) != row['price']
+            ], False
+
+    def commit(self, market_pairs_list: list[dict], keyframe: bool) -> None:
+        """Запам'ятовує ціни записів, збережених у базу даних."""
+        with self._lock:
+            for row in market_pairs_list:
+                self._prices[(row['exchange_name'], row['market_pair'])] = row['price']
+                if keyframe:
+                    self._keyframes[row['exchange_name']] = to_epoch(row['timestamp'])
+
+
+# Спільні для всіх потоків останні збережені ціни
+stored_prices = StoredPriceCache()
+
+
+def save_market_pair_data_bulk(session: Session, market_pairs_list: list[dict], batch_size: int = 1000) -> None:
     """
     Пакетне збереження інформації про ринкові пари у базу даних.
+    Біржа, категорія та посилання пари зберігаються у довіднику, а в таблицю цін пишеться лише pair_id, ціна та час.
+    Записи вставляються частинами по batch_size через executemany одним скомпільованим запитом
+    і разом з новими парами довідника фіксуються однією транзакцією.
 
     Аргументи:
         session (Session): Сесія бази даних.
         market_pairs_list (list[dict]): Список словників з інформацією про ринкові пари.
+        batch_size (int): Кількість записів в одному executemany.
     """
+    stmt = insert(MarketPairData.__table__)
+    started = time.perf_counter()
+
     try:
-        stmt = insert(MarketPairData).values(market_pairs_list)
-        session.execute(stmt)
+        price_rows = market_pair_ids.resolve(session, market_pairs_list)
+        for start in range(0, len(price_rows), batch_size):
+            session.execute(stmt, price_rows[start:start + batch_size])
         session.commit()
         logger.success("Дані успішно збережені у базу даних.")
 
+        elapsed = time.perf_counter() - started
+        INSERT_ROWS.inc(len(price_rows))
+        INSERT_SECONDS.observe(elapsed)
+        if elapsed > 0:
+            INSERT_ROWS_PER_SECOND.set(len(price_rows) / elapsed)
+
     except Exception as e:
         session.rollback()
+        # Кеш міг отримати ідентифікатори пар, вставлених у відкочену транзакцію
+        market_pair_ids.clear()
         logger.error("Помилка при збереженні даних у базу: {error}", error=e)
         raise e
 
 
-def process_market_pair_data(coin_limit: int, exchanges: list[str], save: bool) -> None:
+def fetch_and_store_exchange(
+        coin_limit: int, exchange: str, save: bool, jitter: float = 0.0, batch_size: int = 1000,
+        page_size: int = 0, page_retries: int = 2, keyframe_interval: float = 0.0,
+        stop: Optional[Event] = None) -> set[str]:
     """
-    Основна функція для отримання даних про ринкові пари для кількох бірж та їх збереження у базу даних.
+    Отримує дані про ринкові пари однієї біржі, додає знімок у спільне сховище цін у пам'яті
+    і після цього зберігає його у базу даних. Після фіксації знімка публікується подія snapshot_events.
+    Якщо keyframe_interval > 0, у базу записуються лише змінені ціни та опорні знімки (StoredPriceCache),
+    а сховище цін у пам'яті отримує повний знімок.
+    Поки запобіжник біржі (exchange_health) розімкнено, запит не виконується. Знімок з неотриманими сторінками
+    зберігається, але вважається неповним: він не стає опорним і враховується запобіжником як невдача.
+
+    Аргументи:
+        coin_limit (int): Кількість монет для запиту.
+        exchange (str): Назва біржі для отримання даних.
+        save (bool): Зберігає відповідь у JSON файл, якщо True.
+        jitter (float): Максимальна випадкова затримка перед запитом у секундах.
+        batch_size (int): Кількість записів в одному пакеті вставки.
+        page_size (int): Розмір сторінки; якщо coin_limit більший, дані запитуються сторінками.
+        page_retries (int): Кількість повторних спроб сторінки, що не пройшла валідацію.
+        keyframe_interval (float): Інтервал між опорними знімками у секундах; 0 — записувати всі ціни.
+        stop (Event, optional): Сигнал зупинки: перериває затримку перед запитом, після нього запит не виконується.
+
+    Повертає:
+        set[str]: Назви біржі у збереженому знімку (ключі сховища цін); порожня множина, якщо даних не отримано.
     """
-    for exchange in exchanges:
+    if not exchange_health.allow(exchange):
+        logger.info("Запити до біржі {exchange} тимчасово призупинено", exchange=exchange)
+        return set()
+
+    if jitter > 0:
+        pause(random.uniform(0, jitter), stop)
+    if stop is not None and stop.is_set():
+        return set()
+
+    missing_pages = 0
+    if 0 < page_size < coin_limit:
+        info, missing_pages = fetch_exchange_market_data_paged(
+            coin_limit=coin_limit, exchange=exchange, page_size=page_size, retries=page_retries, save=save,
+            stop=stop)
+    else:
         info = fetch_exchange_market_data(coin_limit=coin_limit, exchange=exchange, save=save)
 
-        if info:
-            market_pairs = info.data.marketPairs
-            timestamp = info.status.timestamp
+    if not info:
+        exchange_health.record_failure(exchange)
+    else:
+        market_pairs = info.data.marketPairs
+        timestamp = info.status.timestamp
+
+        data = [
+            {
+                'market_pair': row.marketPair,
+                'exchange_name': row.exchangeName,
+                'category': row.category,
+                'market_url': row.marketUrl,
+                'price': row.price,
+                'timestamp': timestamp
+            }
+            for row in market_pairs
+        ]
+
+        price_window.add_snapshot(data)
+
+        complete = not missing_pages
+        rows, keyframe = (
+            stored_prices.changes(data, keyframe_interval, complete) if keyframe_interval > 0 else (data, True)
+        )
+        if rows:
+            with SessionLocal() as db:
+                save_market_pair_data_bulk(session=db, market_pairs_list=rows, batch_size=batch_size)
+        if keyframe_interval > 0:
+            stored_prices.commit(rows, keyframe)
+            logger.info("Збережено {stored} з {total} цін біржі {exchange}{keyframe}", stored=len(rows),
+                        total=len(data), exchange=exchange, keyframe=" (опорний знімок)" if keyframe else "")
+
+        exchange_names = {row['exchange_name'] for row in data}
+        if complete:
+            exchange_health.record_success(exchange, exchange_names)
+        else:
+            FETCH_DEGRADED.labels(exchange).inc()
+            logger.warning("Знімок біржі {exchange} неповний: не отримано {missing} сторінок",
+                           exchange=exchange, missing=missing_pages)
+            exchange_health.record_degraded(exchange, exchange_names)
+        snapshot_events.publish(exchange_names)
+        return exchange_names
 
-            data = [
-                {
-                    'market_pair': row.marketPair,
-                    'exchange_name': row.exchangeName,
-                    'category': row.category,
-                    'market_url': row.marketUrl,
-                    'price': row.price,
-                    'timestamp': timestamp
-                }
-                for row in market_pairs
-            ]
+    return set()
 
-            with SessionLocal() as db:
-                save_market_pair_data_bulk(session=db, market_pairs_list=data)
-                time.sleep(random.uniform(60, 120))
+
+def process_market_pair_data(
+        coin_limit: int, exchanges: list[str], save: bool, concurrency: int = 1, jitter: float = 0.0,
+        batch_size: int = 1000, page_size: int = 0, page_retries: int = 2, keyframe_interval: float = 0.0,
+        stop: Optional[Event] = None) -> None:
+    """
+    Основна функція для отримання даних про ринкові пари для кількох бірж та їх збереження у базу даних.
+    Біржі опитуються паралельно, тож знімки різних бірж отримуються з різницею в кілька секунд.
+    Після сигналу stop функція повертається, не чекаючи бірж, які ще обробляються.
+
+    Аргументи:
+        coin_limit (int): Кількість монет для запиту.
+        exchanges (list[str]): Назви бірж для отримання даних.
+        save (bool): Зберігає відповідь у JSON файл, якщо True.
+        concurrency (int): Максимальна кількість одночасних запитів до одного хоста API.
+        jitter (float): Максимальна випадкова затримка перед запитом кожної біржі у секундах.
+        batch_size (int): Кількість записів в одному пакеті вставки.
+        page_size (int): Розмір сторінки запиту; 0 — усі coin_limit пар одним запитом.
+        page_retries (int): Кількість повторних спроб для кожної сторінки.
+        keyframe_interval (float): Інтервал між опорними знімками дельта-запису у секундах; 0 — записувати всі ціни.
+        stop (Event, optional): Сигнал зупинки процесу.
+    """
+    host_limiter.set_limit(concurrency)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, len(exchanges)), thread_name_prefix='fetch')
+    futures = {
+        executor.submit(
+            fetch_and_store_exchange, coin_limit, exchange, save, jitter, batch_size, page_size, page_retries,
+            keyframe_interval, stop
+        ): exchange
+        for exchange in exchanges
+    }
+
+    for future in iter_completed(executor, futures, stop):
+        try:
+            future.result()
+        except Exception as e:
+            logger.error("Помилка при обробці біржі {exchange}: {error}", exchange=futures[future], error=e)
 
 
 if __name__ == '__main__':
@@ -1,108 +1,396 @@
 import os
 import sys
+import time
+from bisect import bisect_left, bisect_right
+from itertools import chain, count
+from collections import deque
+from operator import attrgetter
+from typing import Collection, Iterable, Iterator, Optional
 from datetime import datetime, timedelta, timezone
 
 import requests
+import numpy as np
 from loguru import logger
-from sqlalchemy import and_
+from sqlalchemy import and_, select
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session
 
-from database import MarketPairData, SessionLocal
+from database import MarketPairData, MarketPairInfo, SessionLocal
+from http_client import http_post
+from exchange_health import exchange_health
+from metrics import REPORT_COMPUTE_SECONDS, REPORT_QUERY_SECONDS, TELEGRAM_SEND_SECONDS
+from telegram_queue import TELEGRAM_MESSAGE_LIMIT, get_delivery_queue
+from price_window import MarketPairRow, PriceSeries, PriceWindowStore, price_window, from_epoch
 
 load_dotenv()
 
 logger.remove()
 logger.add(sys.stdout, colorize=True)
 
+# Інтервали звітів від найкоротшого до найдовшого
+REPORT_INTERVALS = {
+    '10 min': timedelta(minutes=10),
+    '30 min': timedelta(minutes=30),
+    '60 min': timedelta(hours=1),
+    '3 hours': timedelta(hours=3),
+}
+
 
 class MarketPairRepository:
     def __init__(self, session: Session):
         self.session = session
 
-    def get_market_pairs_in_timeframe(self, start_time: datetime, end_time: datetime) -> list[[MarketPairData]]:
-        """Отримуємо всі ринкові пари за певний інтервал часу."""
-        return (
-            self.session.query(MarketPairData)
-            .filter(and_(MarketPairData.timestamp >= start_time, MarketPairData.timestamp <= end_time))
-            .order_by(MarketPairData.market_pair, MarketPairData.timestamp)
-            .all()
+    def iter_market_pair_rows(
+            self, start_time: datetime, end_time: datetime, batch_size: int = 5000,
+            exchanges: Optional[Collection[str]] = None) -> Iterator[MarketPairRow]:
+        """
+        Потоково повертає ринкові пари за інтервал часу у вигляді MarketPairRow.
+        Вибираються лише потрібні для звітів колонки, без створення ORM-об'єктів;
+        рядки читаються з курсора партіями по batch_size (серверний курсор, якщо його підтримує драйвер).
+        Якщо задано exchanges, вибираються лише пари цих бірж.
+        """
+        stmt = (
+            select(
+                MarketPairInfo.market_pair,
+                MarketPairInfo.exchange_name,
+                MarketPairData.price,
+                MarketPairData.timestamp,
+                MarketPairInfo.market_url,
+            )
+            .join(MarketPairInfo, MarketPairInfo.id == MarketPairData.pair_id)
+            .where(and_(MarketPairData.timestamp >= start_time, MarketPairData.timestamp <= end_time))
+            .order_by(MarketPairInfo.exchange_name, MarketPairInfo.market_pair, MarketPairData.timestamp)
+            .execution_options(yield_per=batch_size)
         )
+        if exchanges is not None:
+            stmt = stmt.where(MarketPairInfo.exchange_name.in_(exchanges))
+        yield from map(MarketPairRow._make, self.session.execute(stmt))
 
 
 def filter_significant_changes(
-        market_data: list[MarketPairData], threshold: float, processed_market_pairs: set[str]) -> list[dict]:
+        market_data: list[MarketPairRow], threshold: float, processed_market_pairs: set[str]) -> list[dict]:
     """
     Фільтрує пари, ціна яких змінилася більше ніж на threshold% за інтервал.
     Залишає торгові пари, які ще не були оброблені. Відсортовує пари за зміною ціни.
+
+    Записи пари можуть іти у вибірці вперемішку з іншими, тому коди пар і ціни збираються проходом по записах;
+    для згрупованих за парою записів біржі generate_reports() використовує filter_interval_changes().
+    """
+    if not market_data:
+        return []
+
+    # Код пари — індекс її першого запису у вибірці, тобто запису з початковою ціною
+    first_rows = {}
+    codes = np.fromiter(
+        map(first_rows.setdefault, map(attrgetter('market_pair'), market_data), count()),
+        dtype=np.int64, count=len(market_data))
+    prices = np.fromiter(map(attrgetter('price'), market_data), dtype=np.float64, count=len(market_data))
+
+    return first_crossings(
+        market_data, prices, np.arange(len(market_data)), codes, first_rows, threshold, processed_market_pairs)
+
+
+class PriceColumns:
+    """
+    Записи біржі, згруповані за ринковою парою, у вигляді суцільних масивів:
+    rows і prices — записи всіх пар підряд, offsets — межі записів кожної пари.
+    Масиви будуються один раз для біржі, а кожен інтервал звіту вибирається з них зрізом без проходу по записах.
+    """
+
+    def __init__(self, market_pairs: dict[str, list[MarketPairRow]]):
+        self.market_pairs = market_pairs
+        self.rows = list(chain.from_iterable(market_pairs.values()))
+        self.prices = np.fromiter(map(attrgetter('price'), self.rows), dtype=np.float64, count=len(self.rows))
+        lengths = np.fromiter(map(len, market_pairs.values()), dtype=np.int64, count=len(market_pairs))
+        self.offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+    def interval_starts(self, start_time: datetime, step: bool = False) -> np.ndarray:
+        """
+        Повертає для кожної пари індекс (у rows) першого запису, починаючи з start_time.
+        Для ступінчастих рядів (step=True) інтервал починається з останнього запису до start_time.
+        """
+        # Межу шукаємо без перетворення часу кожного запису: початок інтервалу подаємо з тим самим
+        # (наївним UTC або явним) поясом, що й записи пари
+        naive_start = to_naive_utc(start_time)
+        aware_start = naive_start.replace(tzinfo=timezone.utc)
+        key = attrgetter('timestamp')
+        starts = []
+        for rows in self.market_pairs.values():
+            start = aware_start if rows and rows[0].timestamp.tzinfo is not None else naive_start
+            index = bisect_left(rows, start, key=key)
+            if step and index > 0:
+                index -= 1
+            starts.append(index)
+        return self.offsets[:-1] + np.array(starts, dtype=np.int64)
+
+
+def filter_interval_changes(
+        columns: PriceColumns, start_time: datetime, threshold: float, processed_market_pairs: set[str],
+        step: bool = False) -> list[dict]:
+    """
+    Те саме, що filter_significant_changes(slice_interval(market_pairs, start_time, step), ...),
+    але коди пар і ціни інтервалу будуються з масивів PriceColumns груповими операціями NumPy:
+    код кожного запису повторює індекс початку інтервалу його пари (np.repeat за довжинами груп).
+    """
+    starts = columns.interval_starts(start_time, step)
+    lengths = columns.offsets[1:] - starts
+    # Записи вже оброблених пар не потрапляють в інтервал: у коротших інтервалах звіту це більшість пар
+    if processed_market_pairs:
+        lengths[np.fromiter(
+            map(processed_market_pairs.__contains__, columns.market_pairs), dtype=bool,
+            count=len(columns.market_pairs))] = 0
+    total = int(lengths.sum())
+    if not total:
+        return []
+
+    # Код пари — індекс її першого запису в інтервалі; позиції — індекси записів інтервалу в rows
+    codes = np.repeat(starts, lengths)
+    positions = codes + np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    first_rows = {
+        market_pair: start
+        for market_pair, start, length in zip(columns.market_pairs, starts.tolist(), lengths.tolist()) if length
+    }
+
+    return first_crossings(
+        columns.rows, columns.prices, positions, codes, first_rows, threshold, processed_market_pairs)
+
+
+def first_crossings(
+        rows: list[MarketPairRow], prices: np.ndarray, positions: np.ndarray, codes: np.ndarray,
+        first_rows: dict[str, int], threshold: float, processed_market_pairs: set[str]) -> list[dict]:
     """
+    Знаходить для кожної пари перший запис, ціна якого відрізняється від початкової більше ніж на threshold%.
+
+    Аргументи:
+        rows: записи, на які посилаються positions і codes.
+        prices: ціни записів rows.
+        positions: індекси записів вибірки в rows, у порядку вибірки.
+        codes: для кожного запису вибірки — індекс у rows першого запису його пари (з початковою ціною).
+        first_rows: код кожної пари вибірки за її назвою.
+        threshold: поріг зміни ціни у відсотках.
+        processed_market_pairs: вже оброблені пари; знайдені пари додаються до неї.
+
+    Повертає:
+        Зміни цін, відсортовані за change_percentage.
+    """
+    initial_prices = prices[codes]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price_changes = ((prices[positions] - initial_prices) / initial_prices) * 100
+
+    # Перевищення порогу шукаємо серед усіх записів, крім початкових; пари з нульовою ціною ігноруємо
+    crossed = (np.abs(price_changes) >= threshold) & (initial_prices != 0) & (positions != codes)
+
+    # Пропускаємо вже оброблені пари
+    skipped_codes = [first_rows[market_pair] for market_pair in processed_market_pairs if market_pair in first_rows]
+    if skipped_codes:
+        crossed &= ~np.isin(codes, skipped_codes)
+
+    # Для кожної пари залишаємо лише перше перевищення, зберігаючи порядок записів
+    crossed_rows = np.flatnonzero(crossed)
+    _, first_crossing = np.unique(codes[crossed_rows], return_index=True)
+    crossed_rows = np.sort(crossed_rows[first_crossing])
+
     significant_changes = []
-    market_pairs = {}
+    for position, price_change in zip(positions[crossed_rows].tolist(), price_changes[crossed_rows].tolist()):
+        data = rows[position]
+        significant_changes.append({
+            'market_pair': f"{data.market_pair} ({data.exchange_name})",
+            'price': data.price,
+            'change_percentage': price_change,
+            'timestamp': data.timestamp,
+            'market_url': data.market_url
+        })
+        processed_market_pairs.add(data.market_pair)  # Додаємо пару до оброблених
+
+    # Сортуємо результати за change_percentage
+    significant_changes.sort(key=lambda x: x['change_percentage'])
 
+    return significant_changes
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    """Приводить час до наївного UTC, у якому MySQL повертає колонку timestamp."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def partition_market_data(market_data: Iterable[MarketPairRow]) -> dict[str, dict[str, list[MarketPairRow]]]:
+    """
+    Розбиває вибірку на групи за біржею та ринковою парою.
+    Порядок пар і записів у межах пари зберігається таким, яким його повернув запит.
+    """
+    partitions = {}
     for data in market_data:
-        market_pair = data.market_pair
+        partitions.setdefault(data.exchange_name, {}).setdefault(data.market_pair, []).append(data)
+    return partitions
 
-        # Пропускаємо вже оброблені пари
+
+def slice_interval(
+        market_pairs: dict[str, list[MarketPairRow]], start_time: datetime, step: bool = False) -> list[MarketPairRow]:
+    """
+    Повертає записи біржі, починаючи з start_time, у порядку (market_pair, timestamp).
+    Записи кожної пари відсортовані за часом, тому межу інтервалу шукаємо бінарним пошуком.
+    Для ступінчастих рядів (дельта-запис, step=True) інтервал починається з останнього запису до start_time:
+    саме ця ціна діяла на початку інтервалу.
+    """
+    start_time = to_naive_utc(start_time)
+    interval_data = []
+    for rows in market_pairs.values():
+        index = bisect_left(rows, start_time, key=lambda row: to_naive_utc(row.timestamp))
+        if step and index > 0:
+            index -= 1
+        interval_data.extend(rows[index:])
+    return interval_data
+
+
+def detect_price_swings(
+        market_pairs: dict[str, list[MarketPairRow]], start_time: datetime, window: timedelta, threshold: float,
+        processed_market_pairs: set[str], step: bool = False) -> list[dict]:
+    """
+    Шукає пари, ціна яких у ковзному вікні завдовжки window зросла від мінімуму або впала від максимуму
+    більше ніж на threshold%, тож виявляє і різкі злети з поверненням, які пропускає порівняння з першою ціною.
+
+    Для кожної точки, починаючи зі start_time, мінімум і максимум за попереднє вікно підтримуються
+    монотонними чергами, тому кожна пара обробляється за лінійний час. У звіт потрапляють найбільший
+    зліт (max_run_up) і найбільше падіння (max_drawdown) за інтервал, а change_percentage — більше з них за модулем.
+    Залишає торгові пари, які ще не були оброблені. Відсортовує пари за зміною ціни.
+    Для ступінчастих рядів (step=True) точка залишає вікно лише тоді, коли наступна точка вже не пізніша
+    за його початок, тож ціна, що діяла на початку вікна, теж враховується; точки з незмінною ціною
+    не перевіряються, тож результат не залежить від того, чи записувалися повтори ціни.
+    """
+    start_time = to_naive_utc(start_time)
+    price_swings = []
+
+    for market_pair, rows in market_pairs.items():
         if market_pair in processed_market_pairs:
             continue
 
-        # Якщо це перший запис для ринкової пари, зберігаємо його як початкову ціну
-        if market_pair not in market_pairs:
-            market_pairs[market_pair] = data
-        else:
-            initial_price = market_pairs[market_pair].price
-            price_change = ((data.price - initial_price) / initial_price) * 100
+        timestamps = [to_naive_utc(row.timestamp) for row in rows]
+        lows, highs = deque(), deque()  # Індекси точок з монотонно зростаючими та спадними цінами
+        max_run_up, run_up_row = 0.0, None
+        max_drawdown, drawdown_row = 0.0, None
+
+        for index, row in enumerate(rows):
+            while lows and rows[lows[-1]].price >= row.price:
+                lows.pop()
+            lows.append(index)
+            while highs and rows[highs[-1]].price <= row.price:
+                highs.pop()
+            highs.append(index)
+
+            window_start = timestamps[index] - window
+            if step:
+                while lows[0] < index and timestamps[lows[0] + 1] <= window_start:
+                    lows.popleft()
+                while highs[0] < index and timestamps[highs[0] + 1] <= window_start:
+                    highs.popleft()
+            else:
+                while timestamps[lows[0]] < window_start:
+                    lows.popleft()
+                while timestamps[highs[0]] < window_start:
+                    highs.popleft()
+
+            if timestamps[index] < start_time:
+                continue
+            # У ступінчастому ряді точка з незмінною ціною не є новим спостереженням
+            if step and index > 0 and rows[index - 1].price == row.price:
+                continue
+
+            low, high = rows[lows[0]].price, rows[highs[0]].price
+            if low > 0 and (row.price - low) / low * 100 > max_run_up:
+                max_run_up, run_up_row = (row.price - low) / low * 100, row
+            if high > 0 and (row.price - high) / high * 100 < max_drawdown:
+                max_drawdown, drawdown_row = (row.price - high) / high * 100, row
+
+        # Без жодного зльоту чи падіння (рівна ціна або одна точка) пара не потрапляє у звіт навіть при threshold <= 0
+        if (run_up_row is None and drawdown_row is None) or max(max_run_up, -max_drawdown) < threshold:
+            continue
 
-            # Якщо зміна ціни перевищує поріг, додаємо пару у значні зміни
-            if abs(price_change) >= threshold:
-                significant_changes.append({
-                    'market_pair': f"{data.market_pair} ({data.exchange_name})",
-                    'price': data.price,
-                    'change_percentage': price_change,
-                    'timestamp': data.timestamp,
-                    'market_url': data.market_url
-                })
-                processed_market_pairs.add(market_pair)  # Додаємо пару до оброблених
-                # Оскільки зміна знайдена, більше перевірок для цієї пари не потрібно
-                del market_pairs[market_pair]
+        price_change, data = (max_run_up, run_up_row) if max_run_up >= -max_drawdown else (max_drawdown, drawdown_row)
+        price_swings.append({
+            'market_pair': f"{data.market_pair} ({data.exchange_name})",
+            'price': data.price,
+            'change_percentage': price_change,
+            'max_run_up': max_run_up,
+            'max_drawdown': max_drawdown,
+            'timestamp': data.timestamp,
+            'market_url': data.market_url
+        })
+        processed_market_pairs.add(market_pair)
 
     # Сортуємо результати за change_percentage
-    significant_changes.sort(key=lambda x: x['change_percentage'])
+    price_swings.sort(key=lambda x: x['change_percentage'])
 
-    return significant_changes
+    return price_swings
 
 
-def generate_reports(session: Session, threshold: float) -> dict[str, dict[str, list[dict]]]:
+def load_market_data(
+        session: Session, start_time: datetime, end_time: datetime,
+        store: PriceWindowStore = price_window, exchanges: Optional[Collection[str]] = None) -> list[MarketPairRow]:
+    """
+    Повертає записи ринкових пар за вікно: зі сховища цін у пам'яті, якщо воно містить усе вікно,
+    інакше з бази даних. Вибірку з бази за всі біржі використовуємо, щоб доповнити сховище, яке отримує знімки.
+    """
+    if store.covers(start_time):
+        with REPORT_QUERY_SECONDS.labels('store').time():
+            return store.rows(start_time, end_time, exchanges)
+
+    with REPORT_QUERY_SECONDS.labels('database').time():
+        market_data = list(
+            MarketPairRepository(session).iter_market_pair_rows(start_time, end_time, exchanges=exchanges))
+    if store.is_live and exchanges is None:
+        store.load(market_data, since=start_time)
+    return market_data
+
+
+def generate_reports(
+        session: Session, threshold: float, store: PriceWindowStore = price_window,
+        swings: bool = False, exchanges: Optional[Collection[str]] = None, lookback: timedelta = timedelta(0),
+        exclude: Collection[str] = ()) -> dict[str, dict[str, list[dict]]]:
     """
     Генеруємо звіти по ринкових парах для інтервалів часу, уникаючи повторення пар.
+    Дані за найширший інтервал вибираються один раз (зі сховища цін у пам'яті або з бази),
+    а всі коротші інтервали обчислюються з цієї ж вибірки в пам'яті.
+    Якщо swings=True, зміни шукаються за мінімумом і максимумом у ковзному вікні (detect_price_swings),
+    інакше — порівнянням з першою ціною інтервалу (filter_interval_changes).
+    Якщо задано exchanges, звіти генеруються лише для цих бірж; біржі з exclude пропускаються.
+    Якщо lookback > 0, ряди вважаються ступінчастими (дельта-запис): додатково вибираються записи за lookback
+    до початку вікна, і ціна на початку кожного інтервалу береться з останнього запису до нього.
     """
     current_time = datetime.now(timezone.utc)
-    intervals = {
-        '10 min': current_time - timedelta(minutes=10),
-        '30 min': current_time - timedelta(minutes=30),
-        '60 min': current_time - timedelta(hours=1),
-        '3 hours': current_time - timedelta(hours=3),
-    }
+    intervals = {interval_name: current_time - length for interval_name, length in REPORT_INTERVALS.items()}
 
     reports = {}
     processed_market_pairs = set()  # Множина для зберігання оброблених торгових пар
 
-    repository = MarketPairRepository(session)
-    exchanges = {record.exchange_name for record in session.query(MarketPairData.exchange_name).distinct()}
+    window_start = min(intervals.values()) - lookback
+    step = lookback > timedelta(0)
+    market_data = load_market_data(session, window_start, current_time, store, exchanges)
+    logger.debug(f"Market data between {window_start} and {current_time}: [ {len(market_data)} ]")
 
-    logger.success(f"Exchanges found: {exchanges}")
+    partitions = partition_market_data(market_data)
+    logger.success(f"Exchanges found: {set(partitions)}")
 
-    for exchange in exchanges:
+    if step:
+        # Записи до початку вікна потрібні лише для ціни, що діяла на його початку
+        for market_pairs in partitions.values():
+            for market_pair, rows in market_pairs.items():
+                market_pairs[market_pair] = slice_interval({market_pair: rows}, window_start + lookback, step=True)
+
+    for exchange, market_pairs in partitions.items():
+        if exchange in exclude:
+            continue
         exchange_reports = {}
+        columns = None if swings else PriceColumns(market_pairs)
         for interval_name, start_time in sorted(intervals.items(), key=lambda x: x[1], reverse=True):
-            market_data = repository.get_market_pairs_in_timeframe(start_time, current_time)
-            logger.debug(f"Market data for {exchange} between {start_time} and {current_time}: [ {len(market_data)} ]")
-
-            # Фільтруємо дані по біржі
-            filtered_data = [data for data in market_data if data.exchange_name == exchange]
-            logger.debug(f"Filtered data for {exchange} {interval_name}: [ {len(filtered_data)} ]")
-
-            report = filter_significant_changes(filtered_data, threshold, processed_market_pairs)
+            started = time.perf_counter()
+            if swings:
+                report = detect_price_swings(
+                    market_pairs, start_time, REPORT_INTERVALS[interval_name], threshold, processed_market_pairs, step)
+            else:
+                report = filter_interval_changes(columns, start_time, threshold, processed_market_pairs, step)
+            REPORT_COMPUTE_SECONDS.labels(interval_name).observe(time.perf_counter() - started)
             logger.debug(f"Report for {exchange} in interval {interval_name}: [ {len(report)} ]")
 
             if report:
@@ -114,24 +402,158 @@ def generate_reports(session: Session, threshold: float) -> dict[str, dict[str,
     return reports
 
 
-def format_telegram_messages(reports: dict[str, dict[str, list[dict[str, str | float | datetime]]]]) -> dict[str, str]:
+class IncrementalReportEvaluator:
+    """
+    Інкрементальна генерація звітів за сховищем цін у пам'яті.
+
+    Між запусками для кожної пари зберігаються час останньої обробленої точки та опорна (перша у вікні)
+    ціна кожного інтервалу, тому перевіряються лише точки, що надійшли після попереднього запуску.
+    Вартість запуску залежить від кількості нових точок, а не від розміру вікна.
+    Перший запуск перевіряє всі точки вікна, так само як generate_reports().
+    """
+
+    def __init__(self, store: PriceWindowStore = price_window, intervals: dict[str, timedelta] = REPORT_INTERVALS):
+        self.store = store
+        self.intervals = intervals
+        self._last_seen: dict[tuple[str, str], float] = {}
+        self._anchors: dict[tuple[str, str, str], tuple[float, float]] = {}
+
+    def evaluate(
+            self, threshold: float, exchanges: Optional[Collection[str]] = None, step: bool = False,
+            exclude: Collection[str] = ()) -> dict[str, dict[str, list[dict]]]:
+        """
+        Повертає звіти у форматі generate_reports() за точками, що надійшли після попереднього запуску.
+        Пара потрапляє у найкоротший інтервал, для якого нова точка відхиляється від опорної ціни
+        щонайменше на threshold%. Якщо задано exchanges, перевіряються лише пари цих бірж; пари бірж з exclude
+        позначаються обробленими без перевірки. Для ступінчастих рядів (step=True) опорною є ціна,
+        що діяла на початку інтервалу.
+        """
+        return self.store.read(lambda series_map: self._evaluate(series_map, threshold, exchanges, step, exclude))
+
+    def mark_seen(self, exchanges: Optional[Collection[str]] = None) -> None:
+        """Позначає точки сховища (лише бірж exchanges, якщо задано) обробленими, наприклад після повної генерації."""
+        def reader(series_map: dict[tuple[str, str], PriceSeries]) -> None:
+            for key, series in series_map.items():
+                if exchanges is None or key[0] in exchanges:
+                    self._last_seen[key] = series.timestamps[-1]
+
+        self.store.read(reader)
+
+    def _anchor(
+            self, key: tuple[str, str], series: PriceSeries, interval_name: str,
+            window_start: float, step: bool = False) -> Optional[tuple[float, float]]:
+        """
+        Повертає (час, ціна) першої точки інтервалу, оновлюючи збережену опору, якщо вона вийшла з вікна.
+        Для ступінчастих рядів опора — остання точка не пізніше за початок інтервалу і перераховується щоразу.
+        """
+        anchor = self._anchors.get((*key, interval_name))
+        if anchor is None or anchor[0] < window_start or step:
+            index = bisect_left(series.timestamps, window_start, series.start)
+            if step and index > series.start:
+                index -= 1
+            if index == len(series.timestamps):
+                return None
+            anchor = self._anchors[(*key, interval_name)] = (series.timestamps[index], series.prices[index])
+        return anchor
+
+    def _evaluate(
+            self, series_map: dict[tuple[str, str], PriceSeries], threshold: float,
+            exchanges: Optional[Collection[str]] = None, step: bool = False,
+            exclude: Collection[str] = ()) -> dict[str, dict[str, list[dict]]]:
+        now = time.time()
+        window_starts = {name: now - length.total_seconds() for name, length in self.intervals.items()}
+        reports = {}
+        processed_market_pairs = set()
+
+        # Пари, що зникли зі сховища, більше не потребують стану
+        for key in self._last_seen.keys() - series_map.keys():
+            del self._last_seen[key]
+            for interval_name in self.intervals:
+                self._anchors.pop((*key, interval_name), None)
+
+        for key in sorted(series_map):
+            if exchanges is not None and key[0] not in exchanges:
+                continue
+            series = series_map[key]
+            first_new = bisect_right(series.timestamps, self._last_seen.get(key, float('-inf')), series.start)
+            if first_new == len(series.timestamps):
+                continue
+            self._last_seen[key] = series.timestamps[-1]
+
+            exchange, market_pair = key
+            if exchange in exclude or market_pair in processed_market_pairs:
+                continue
+
+            for interval_name, window_start in window_starts.items():
+                anchor = self._anchor(key, series, interval_name, window_start, step)
+                if anchor is None or anchor[1] == 0:
+                    continue
+
+                anchor_time, initial_price = anchor
+                change = self._first_crossing(series, first_new, anchor_time, initial_price, threshold)
+                if change is not None:
+                    index, price_change = change
+                    reports.setdefault(exchange, {}).setdefault(interval_name, []).append({
+                        'market_pair': f"{market_pair} ({exchange})",
+                        'price': series.prices[index],
+                        'change_percentage': price_change,
+                        'timestamp': from_epoch(series.timestamps[index]),
+                        'market_url': series.market_url
+                    })
+                    processed_market_pairs.add(market_pair)
+                    break
+
+        for exchange_reports in reports.values():
+            for report in exchange_reports.values():
+                report.sort(key=lambda x: x['change_percentage'])
+
+        return reports
+
+    @staticmethod
+    def _first_crossing(
+            series: PriceSeries, first_new: int, anchor_time: float, initial_price: float,
+            threshold: float) -> Optional[tuple[int, float]]:
+        """Шукає серед нових точок після опорної першу, що відхиляється від опорної ціни щонайменше на threshold%."""
+        start = max(first_new, bisect_right(series.timestamps, anchor_time, first_new))
+        for index in range(start, len(series.timestamps)):
+            price_change = ((series.prices[index] - initial_price) / initial_price) * 100
+            if abs(price_change) >= threshold:
+                return index, price_change
+        return None
+
+
+# Стан інкрементальної генерації звітів зберігається між запусками в межах процесу
+incremental_evaluator = IncrementalReportEvaluator()
+
+
+def format_telegram_messages(
+        reports: dict[str, dict[str, list[dict[str, str | float | datetime]]]],
+        stale: Optional[dict[str, float]] = None) -> dict[str, list[str]]:
     """
     Формуємо текстові повідомлення для кожної біржі і кожного інтервалу часу.
+    Для бірж із застарілими даними (stale: біржа -> час останнього знімка) під назвою біржі додається попередження.
     URL буде інтегровано в назву торгової пари, щоб зробити її клікабельною у HTML форматі.
     Рядки вирівнюються пробілами для відповідності ширині рядка у 40 символів.
+    Звіт біржі розбивається на повідомлення не довші за TELEGRAM_MESSAGE_LIMIT символів лише між рядками,
+    тож теги <a> не розриваються; заголовок інтервалу не відокремлюється від першого рядка і повторюється
+    на початку повідомлення-продовження.
     """
     max_line_length = 30  # Максимальна довжина рядка на телефоні
     messages = {}
 
     for exchange, intervals in reports.items():
+        chunks = []
         message_parts = [f"Біржа: {exchange}\n"]  # Зберігаємо частини повідомлення
+        if stale and exchange in stale:
+            message_parts.append(f"⚠️ Дані застарілі, останній знімок о {from_epoch(stale[exchange]):%H:%M} UTC\n")
+        message_length = sum(len(part) for part in message_parts)
 
         for interval, changes in intervals.items():
             # Сортуємо зміни за 'change_percentage' перед формуванням повідомлення
             sorted_changes = sorted(changes, key=lambda x: x['change_percentage'])
-            message_parts.append(f"\n{interval}:\n{'-' * max_line_length}\n")
+            interval_header = f"\n{interval}:\n{'-' * max_line_length}\n"
 
-            for change in sorted_changes:
+            for index, change in enumerate(sorted_changes):
                 market_pair = change['market_pair'].split(" ")[0]
                 change_percentage = f"{change['change_percentage']:.2f}%"
 
@@ -143,10 +565,23 @@ def format_telegram_messages(reports: dict[str, dict[str, list[dict[str, str | f
                 spaces = " " * spaces_needed if spaces_needed > 0 else ""
 
                 # Формуємо рядок з посиланням та вирівняним відсотком зміни
-                message_parts.append(
-                    f"<a href='{change['market_url']}'>{market_pair}</a>{spaces}{change_percentage}\n")
+                line = f"<a href='{change['market_url']}'>{market_pair}</a>{spaces}{change_percentage}\n"
+                if index == 0:
+                    line = interval_header + line
+
+                # Якщо рядок не вміщується, починаємо нове повідомлення з заголовками біржі та інтервалу
+                if message_length + len(line) > TELEGRAM_MESSAGE_LIMIT:
+                    chunks.append(''.join(message_parts))
+                    message_parts = [f"Біржа: {exchange} (продовження)\n"]
+                    if index > 0:
+                        message_parts.append(interval_header)
+                    message_length = sum(len(part) for part in message_parts)
+
+                message_parts.append(line)
+                message_length += len(line)
 
-        messages[exchange] = ''.join(message_parts)
+        chunks.append(''.join(message_parts))
+        messages[exchange] = chunks
 
     return messages
 
@@ -164,8 +599,10 @@ def send_telegram_message(token: str, chat_id: str, message: str) -> None:
         'disable_web_page_preview': True
     }
 
+    started = time.perf_counter()
     try:
-        response = requests.post(url, data=data)
+        response = http_post(url, data=data)
+        TELEGRAM_SEND_SECONDS.labels(str(response.status_code)).observe(time.perf_counter() - started)
         response.raise_for_status()
         response_json = response.json()
 
@@ -183,16 +620,47 @@ def send_telegram_message(token: str, chat_id: str, message: str) -> None:
         logger.error(f"Other error occurred: {err}")
 
 
-def run_report_generation(threshold: float, telegram_token: str, telegram_chat_id: str) -> None:
+def run_report_generation(
+        threshold: float, telegram_token: str, telegram_chat_id: str, incremental: bool = False,
+        swings: bool = False, queued: bool = False, exchanges: Optional[Collection[str]] = None,
+        lookback: timedelta = timedelta(0), stale_policy: str = 'flag') -> None:
     """
     Основна функція, яка керує процесом збору даних, формування звітів та відправлення повідомлень у Telegram.
+    В інкрементальному режимі, коли сховище цін у пам'яті містить усе вікно звітів, перевіряються лише нові точки.
+    Пошук злетів і падінь у ковзному вікні (swings=True) завжди виконується за повним вікном.
+    Якщо queued=True, повідомлення передаються фоновій черзі доставки і функція не чекає їх відправлення.
+    Якщо задано exchanges (наприклад, за подією snapshot_events), звіти генеруються лише для цих бірж.
+    Для дельта-запису lookback — інтервал опорних знімків, за який вибираються ціни, що діяли на початку вікна.
+    Біржі із застарілими даними (exchange_health) пропускаються при stale_policy='skip'
+    або позначаються попередженням у повідомленні при stale_policy='flag'.
     """
-    with SessionLocal() as session:
-        reports = generate_reports(session, threshold)
-        if reports:
-            messages = format_telegram_messages(reports)
-            for message in messages.values():
-                send_telegram_message(telegram_token, telegram_chat_id, message)
+    window_start = datetime.now(timezone.utc) - max(REPORT_INTERVALS.values()) - lookback
+    incremental = incremental and not swings
+    step = lookback > timedelta(0)
+
+    stale = exchange_health.stale_exchanges()
+    if stale:
+        logger.warning(f"Stale exchanges: {set(stale)}")
+    exclude = set(stale) if stale_policy == 'skip' else set()
+
+    if incremental and incremental_evaluator.store.covers(window_start):
+        with REPORT_COMPUTE_SECONDS.labels('incremental').time():
+            reports = incremental_evaluator.evaluate(threshold, exchanges, step, exclude)
+    else:
+        with SessionLocal() as session:
+            reports = generate_reports(
+                session, threshold, swings=swings, exchanges=exchanges, lookback=lookback, exclude=exclude)
+        if incremental:
+            incremental_evaluator.mark_seen(exchanges)
+
+    if reports:
+        messages = format_telegram_messages(reports, stale if stale_policy == 'flag' else None)
+        for chunks in messages.values():
+            for message in chunks:
+                if queued:
+                    get_delivery_queue(telegram_token).enqueue(telegram_chat_id, message)
+                else:
+                    send_telegram_message(telegram_token, telegram_chat_id, message)
 
 
 if __name__ == '__main__':
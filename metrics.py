@@ -0,0 +1,54 @@
+import sys
+
+from loguru import logger
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+logger.remove()
+logger.add(sys.stdout, colorize=True)
+
+# Межі гістограм тривалості у секундах: від мілісекунд для сховища в пам'яті до хвилин для повільних запитів
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+FETCH_SECONDS = Histogram(
+    'marketpulse_fetch_seconds', 'Тривалість запиту до API CoinMarketCap', ['exchange'], buckets=DURATION_BUCKETS)
+FETCH_PAYLOAD_BYTES = Histogram(
+    'marketpulse_fetch_payload_bytes', 'Розмір відповіді API CoinMarketCap у байтах', ['exchange'],
+    buckets=(16e3, 64e3, 256e3, 512e3, 1e6, 2e6, 4e6, 8e6, 16e6))
+FETCH_DEGRADED = Counter(
+    'marketpulse_fetch_degraded_total', 'Кількість знімків біржі, збережених без частини сторінок', ['exchange'])
+VALIDATION_SECONDS = Histogram(
+    'marketpulse_validation_seconds', 'Тривалість валідації відповіді API моделлю pydantic', ['model'],
+    buckets=DURATION_BUCKETS)
+
+INSERT_ROWS = Counter('marketpulse_insert_rows_total', 'Кількість записів, вставлених у таблицю цін')
+INSERT_SECONDS = Histogram(
+    'marketpulse_insert_seconds', 'Тривалість збереження знімка біржі у базу даних', buckets=DURATION_BUCKETS)
+INSERT_ROWS_PER_SECOND = Gauge(
+    'marketpulse_insert_rows_per_second', 'Швидкість вставки останнього знімка, записів за секунду')
+
+REPORT_QUERY_SECONDS = Histogram(
+    'marketpulse_report_query_seconds', 'Тривалість вибірки даних для звітів', ['source'], buckets=DURATION_BUCKETS)
+REPORT_COMPUTE_SECONDS = Histogram(
+    'marketpulse_report_compute_seconds', 'Тривалість обчислення звіту для інтервалу', ['interval'],
+    buckets=DURATION_BUCKETS)
+
+TELEGRAM_SEND_SECONDS = Histogram(
+    'marketpulse_telegram_send_seconds', 'Тривалість запиту sendMessage до Telegram', ['status'],
+    buckets=DURATION_BUCKETS)
+
+DELETE_ROWS = Counter('marketpulse_delete_rows_total', 'Кількість видалених старих записів', ['method'])
+DELETE_PARTITIONS = Counter('marketpulse_delete_partitions_total', 'Кількість видалених погодинних секцій')
+DELETE_SECONDS = Histogram(
+    'marketpulse_delete_seconds', 'Тривалість видалення старих записів', ['method'], buckets=DURATION_BUCKETS)
+
+
+def start_metrics_server(port: int, addr: str = '127.0.0.1') -> None:
+    """
+    Запускає HTTP-сервер метрик Prometheus у фоновому потоці.
+
+    Аргументи:
+        port (int): Порт, на якому метрики доступні за шляхом /metrics.
+        addr (str): Адреса, на якій слухає сервер.
+    """
+    start_http_server(port, addr=addr)
+    logger.info(f"Metrics available at http://{addr}:{port}/metrics")
@@ -3,10 +3,13 @@ import time
 from datetime import datetime, timedelta, timezone
 
 from loguru import logger
-from sqlalchemy import delete
+from sqlalchemy import delete, select, text
 from dotenv import load_dotenv
 from sqlalchemy.orm import Session
-from database import MarketPairData, SessionLocal
+from database import (
+    MarketPairData, SessionLocal, get_partitions, partition_upper_bound, add_future_partitions
+)
+from metrics import DELETE_PARTITIONS, DELETE_ROWS, DELETE_SECONDS
 
 load_dotenv()
 
@@ -14,14 +17,123 @@ logger.remove()
 logger.add(sys.stdout, colorize=True)
 
 
-def delete_old_records(session: Session, hours: int = 7) -> None:
+def drop_expired_partitions(session: Session, hours: int = 7, hours_ahead: int = 24) -> int:
+    """
+    Видаляє погодинні секції market_pairs, усі записи яких старіші ніж вказана кількість годин,
+    та створює секції наперед. Час виконання не залежить від кількості записів;
+    записи старшої за межу частини поточної секції видаляються разом з нею наступного разу.
+
+    Аргументи:
+        session (Session): Сесія бази даних.
+        hours (int): Кількість годин для фільтрації старих записів. За замовчуванням 7 годин.
+        hours_ahead (int): На скільки годин наперед мають існувати секції.
+
+    Повертає:
+        int: Кількість видалених секцій.
+    """
+    threshold_date = (datetime.now(timezone.utc) - timedelta(hours=hours)).replace(tzinfo=None)
+    connection = session.connection()
+
+    try:
+        created = add_future_partitions(connection, hours_ahead)
+        expired = [name for name in get_partitions(connection) if partition_upper_bound(name) <= threshold_date]
+        if expired:
+            connection.execute(text(f"ALTER TABLE market_pairs DROP PARTITION {', '.join(expired)}"))
+        session.commit()
+        logger.info("Видалено {count} секцій старіших ніж {hours} годин, створено {created} нових секцій",
+                    count=len(expired), hours=hours, created=created)
+        return len(expired)
+
+    except Exception as e:
+        session.rollback()
+        logger.error("Помилка при видаленні старих секцій: {error}", error=e)
+        raise e
+
+
+def delete_old_records_in_batches(
+        session: Session, hours: int = 7, batch_size: int = 10000, pause: float = 0.0) -> int:
+    """
+    Видаляє записи з таблиці MarketPairData, які старіші ніж вказана кількість годин, частинами.
+    Кожна частина — діапазон первинного ключа з batch_size найстаріших за id записів — фіксується окремою
+    транзакцією, тож блокування не заважають одночасним вставкам нових даних.
+
+    Аргументи:
+        session (Session): Сесія бази даних.
+        hours (int): Кількість годин для фільтрації старих записів. За замовчуванням 7 годин.
+        batch_size (int): Максимальна кількість записів в одній частині.
+        pause (float): Пауза між частинами у секундах для обмеження навантаження на диск.
+
+    Повертає:
+        int: Кількість видалених записів.
+    """
+    threshold_date = datetime.now(timezone.utc) - timedelta(hours=hours)
+    total_count = 0
+    chunk = 0
+
+    try:
+        while True:
+            started = time.perf_counter()
+            ids = session.execute(
+                select(MarketPairData.id)
+                .where(MarketPairData.timestamp < threshold_date)
+                .order_by(MarketPairData.id)
+                .limit(batch_size)
+            ).scalars().all()
+
+            if not ids:
+                break
+
+            result = session.execute(
+                delete(MarketPairData)
+                .where(MarketPairData.id.between(ids[0], ids[-1]), MarketPairData.timestamp < threshold_date)
+            )
+            session.commit()
+
+            chunk += 1
+            total_count += result.rowcount
+            logger.debug("Частина {chunk}: видалено {count} записів за {elapsed:.3f} с",
+                         chunk=chunk, count=result.rowcount, elapsed=time.perf_counter() - started)
+
+            if len(ids) < batch_size:
+                break
+            if pause > 0:
+                time.sleep(pause)
+
+        logger.info("Видалено {count} записів старіших ніж {hours} годин за {chunks} частин",
+                    count=total_count, hours=hours, chunks=chunk)
+        return total_count
+
+    except Exception as e:
+        session.rollback()
+        logger.error("Помилка при видаленні старих записів: {error}", error=e)
+        raise e
+
+
+def delete_old_records(
+        session: Session, hours: int = 7, hours_ahead: int = 24, batch_size: int = 0, pause: float = 0.0) -> None:
     """
     Видаляє записи з таблиці MarketPairData, які старіші ніж вказана кількість годин.
+    Для секціонованої таблиці видаляються цілі секції; інакше записи видаляються одним запитом DELETE
+    або, якщо задано batch_size, частинами по batch_size записів.
 
     Аргументи:
         session (Session): Сесія бази даних.
         hours (int): Кількість годин для фільтрації старих записів. За замовчуванням 7 годин.
+        hours_ahead (int): На скільки годин наперед створюються секції секціонованої таблиці.
+        batch_size (int): Кількість записів в одній частині видалення; 0 — видалення одним запитом.
+        pause (float): Пауза між частинами видалення у секундах.
     """
+    if get_partitions(session.connection()):
+        with DELETE_SECONDS.labels('partitions').time():
+            DELETE_PARTITIONS.inc(drop_expired_partitions(session, hours=hours, hours_ahead=hours_ahead))
+        return
+
+    if batch_size > 0:
+        with DELETE_SECONDS.labels('batched').time():
+            DELETE_ROWS.labels('batched').inc(
+                delete_old_records_in_batches(session, hours=hours, batch_size=batch_size, pause=pause))
+        return
+
     threshold_date = datetime.now(timezone.utc) - timedelta(hours=hours)
 
     # Формуємо запит для видалення записів
@@ -29,8 +141,10 @@ def delete_old_records(session: Session, hours: int = 7) -> None:
 
     try:
         # Виконуємо запит
-        result = session.execute(stmt)
-        session.commit()
+        with DELETE_SECONDS.labels('single').time():
+            result = session.execute(stmt)
+            session.commit()
+        DELETE_ROWS.labels('single').inc(result.rowcount)
         logger.info("Видалено {count} записів старіших ніж {hours} годин", count=result.rowcount, hours=hours)
 
     except Exception as e:
@@ -0,0 +1,217 @@
+import os
+import time
+from array import array
+from threading import Lock
+from bisect import bisect_left, bisect_right
+from typing import Callable, Collection, Iterable, NamedTuple, Optional, TypeVar
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EPOCH = datetime(1970, 1, 1)
+
+T = TypeVar('T')
+
+# Запас понад горизонт сховища, щоб вікно завдовжки з горизонт не втрачало перших точок
+EVICTION_SLACK = 900
+
+
+class MarketPairRow(NamedTuple):
+    """Легкий запис ринкової пари лише з колонками, потрібними для звітів."""
+    market_pair: str
+    exchange_name: str
+    price: float
+    timestamp: datetime
+    market_url: str
+
+
+def to_epoch(value: datetime) -> float:
+    """Перетворює час у секунди від початку епохи; наївний час вважається UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def from_epoch(value: float) -> datetime:
+    """Перетворює секунди від початку епохи у наївний UTC, у якому час повертає база даних."""
+    return EPOCH + timedelta(seconds=value)
+
+
+class PriceSeries:
+    """
+    Ковзний буфер цін однієї ринкової пари: компактні масиви часу (секунди епохи) та цін.
+    Застарілі точки відкидаються зсувом початку буфера, масиви стискаються, коли зсув перевищує половину.
+    """
+    __slots__ = ('timestamps', 'prices', 'start', 'market_url')
+
+    def __init__(self, market_url: str):
+        self.timestamps = array('d')
+        self.prices = array('d')
+        self.start = 0
+        self.market_url = market_url
+
+    def __len__(self) -> int:
+        return len(self.timestamps) - self.start
+
+    def append(self, timestamp: float, price: float) -> None:
+        """Додає точку; точки, не новіші за останню, ігноруються, щоб буфер лишався впорядкованим."""
+        if len(self) and timestamp <= self.timestamps[-1]:
+            return
+        self.timestamps.append(timestamp)
+        self.prices.append(price)
+
+    def evict(self, before: float) -> None:
+        """Відкидає точки, старші за before."""
+        self.start = bisect_left(self.timestamps, before, self.start)
+        if self.start > 64 and self.start * 2 > len(self.timestamps):
+            del self.timestamps[:self.start]
+            del self.prices[:self.start]
+            self.start = 0
+
+    def bounds(self, start: float, end: float) -> tuple[int, int]:
+        """Повертає межі індексів точок у проміжку [start, end]."""
+        lo = bisect_left(self.timestamps, start, self.start)
+        return lo, bisect_right(self.timestamps, end, lo)
+
+
+class PriceWindowStore:
+    """
+    Сховище цін за останні hours годин у пам'яті процесу з ключем (exchange_name, market_pair).
+
+    Наповнюється отримувачем даних при кожному знімку біржі та використовується генератором звітів
+    замість запиту до бази даних. Сховище вважається повним для вікна, лише якщо воно отримує знімки
+    і містить дані від початку вікна: з моменту першого знімка або з вікна, завантаженого з бази даних.
+    """
+
+    def __init__(self, hours: float = 3):
+        self.hours = hours
+        self.horizon = hours * 3600
+        self._series: dict[tuple[str, str], PriceSeries] = {}
+        self._covered_since: Optional[float] = None
+        self._live = False
+        self._lock = Lock()
+
+    def add_snapshot(self, market_pairs_list: list[dict]) -> None:
+        """
+        Додає знімок біржі у сховище та відкидає застарілі точки.
+
+        Аргументи:
+            market_pairs_list (list[dict]): Список словників з інформацією про ринкові пари.
+        """
+        if not market_pairs_list:
+            return
+
+        with self._lock:
+            for row in market_pairs_list:
+                key = (row['exchange_name'], row['market_pair'])
+                series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = PriceSeries(row['market_url'])
+                series.market_url = row['market_url']
+                series.append(to_epoch(row['timestamp']), row['price'])
+
+            if self._covered_since is None:
+                self._covered_since = min(to_epoch(row['timestamp']) for row in market_pairs_list)
+            self._live = True
+            self._evict()
+
+    def load(self, rows: Iterable[MarketPairRow], since: datetime) -> None:
+        """
+        Доповнює сховище записами з бази даних за вікно від since, щоб наступні звіти не зверталися до бази.
+
+        Аргументи:
+            rows (Iterable[MarketPairRow]): Записи за вікно у будь-якому порядку.
+            since (datetime): Початок вікна, за яке завантажено записи.
+        """
+        grouped: dict[tuple[str, str], list[tuple[float, float]]] = {}
+        urls = {}
+        for row in rows:
+            key = (row.exchange_name, row.market_pair)
+            grouped.setdefault(key, []).append((to_epoch(row.timestamp), row.price))
+            urls[key] = row.market_url
+
+        with self._lock:
+            for key, points in grouped.items():
+                series = self._series.get(key)
+                if series is not None:
+                    points.extend(zip(series.timestamps[series.start:], series.prices[series.start:]))
+
+                merged = PriceSeries(series.market_url if series is not None else urls[key])
+                for timestamp, price in sorted(dict(points).items()):
+                    merged.append(timestamp, price)
+                self._series[key] = merged
+
+            since_epoch = to_epoch(since)
+            if self._covered_since is None or since_epoch < self._covered_since:
+                self._covered_since = since_epoch
+            self._evict()
+
+    def set_lookback(self, seconds: float) -> None:
+        """
+        Подовжує горизонт сховища на lookback звітів, щоб ступінчасті ряди дельта-запису разом із ціною,
+        що діяла на початку вікна, читалися зі сховища, а не з бази даних.
+
+        Аргументи:
+            seconds (float): Проміжок перед вікном звітів у секундах.
+        """
+        with self._lock:
+            self.horizon = self.hours * 3600 + seconds
+
+    @property
+    def is_live(self) -> bool:
+        """Чи отримує сховище знімки від отримувача даних у цьому процесі."""
+        return self._live
+
+    def covers(self, start_time: datetime) -> bool:
+        """Чи містить сховище всі дані від start_time."""
+        start = to_epoch(start_time)
+        return (
+            self._live
+            and self._covered_since is not None
+            and self._covered_since <= start
+            and start >= time.time() - self.horizon - EVICTION_SLACK
+        )
+
+    def rows(
+            self, start_time: datetime, end_time: datetime,
+            exchanges: Optional[Collection[str]] = None) -> list[MarketPairRow]:
+        """
+        Повертає записи за проміжок часу у порядку (exchange_name, market_pair, timestamp),
+        як і запит до бази даних. Якщо задано exchanges, повертаються лише записи цих бірж.
+        """
+        start, end = to_epoch(start_time), to_epoch(end_time)
+        result = []
+
+        with self._lock:
+            for key in sorted(self._series):
+                if exchanges is not None and key[0] not in exchanges:
+                    continue
+                series = self._series[key]
+                lo, hi = series.bounds(start, end)
+                exchange_name, market_pair = key
+                result.extend(
+                    MarketPairRow(market_pair, exchange_name, price, from_epoch(timestamp), series.market_url)
+                    for timestamp, price in zip(series.timestamps[lo:hi], series.prices[lo:hi])
+                )
+
+        return result
+
+    def read(self, reader: Callable[[dict[tuple[str, str], PriceSeries]], T]) -> T:
+        """Викликає reader з рядами сховища під блокуванням, щоб ряди не змінювалися під час читання."""
+        with self._lock:
+            return reader(self._series)
+
+    def _evict(self) -> None:
+        """Відкидає точки, старші за горизонт сховища, та пари без точок."""
+        before = time.time() - self.horizon - EVICTION_SLACK
+        for key in list(self._series):
+            series = self._series[key]
+            series.evict(before)
+            if not len(series):
+                del self._series[key]
+
+
+# Спільне для потоків процесу сховище цін
+price_window = PriceWindowStore(hours=float(os.getenv('PRICE_WINDOW_HOURS', 3)))
@@ -0,0 +1,127 @@
+import sys
+import time
+import signal
+import random
+import asyncio
+from threading import Event, Thread
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from loguru import logger
+
+logger.remove()
+logger.add(sys.stdout, colorize=True)
+
+
+@dataclass
+class Job:
+    """
+    Періодична задача планувальника.
+
+    Аргументи:
+        name (str): Назва задачі для логів.
+        func (Callable[[], None]): Функція, що виконується в окремому потоці.
+        interval (float | Callable[[], float]): Інтервал між запусками у секундах або функція, що його повертає.
+        jitter (float): Максимальна випадкова добавка до інтервалу у секундах.
+        scheduled (bool): Запускати задачу лише в межах робочого часу.
+    """
+    name: str
+    func: Callable[[], None]
+    interval: float | Callable[[], float]
+    jitter: float = 0.0
+    scheduled: bool = True
+
+    def next_interval(self) -> float:
+        """Повертає інтервал до наступного запуску з урахуванням випадкової добавки."""
+        interval = self.interval() if callable(self.interval) else self.interval
+        return interval + (random.uniform(0, self.jitter) if self.jitter > 0 else 0)
+
+
+class Scheduler:
+    """
+    Планувальник на asyncio, що запускає задачі з фіксованим темпом.
+
+    Кожна задача виконується в окремому фоновому потоці і не перекривається сама з собою: наступний запуск
+    планується від часу початку попереднього, а пропущені через довге виконання запуски не накопичуються.
+    Після SIGTERM або SIGINT нові запуски не починаються, а на завершення процесу відводиться shutdown_timeout:
+    поточні запуски чекають у межах цього терміну, а залишок (remaining) отримують подальші кроки зупинки.
+    Задачі дізнаються про зупинку через stop_event, щоб перервати очікування і не починати нових запитів.
+    """
+
+    def __init__(
+            self, jobs: list[Job], is_active: Optional[Callable[[], bool]] = None, shutdown_timeout: float = 8.0,
+            stop_event: Optional[Event] = None):
+        self.jobs = jobs
+        self.is_active = is_active
+        self.shutdown_timeout = shutdown_timeout
+        self.stop_event = stop_event or Event()
+        self._deadline: Optional[float] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def run(self) -> None:
+        """Запускає всі задачі та працює до сигналу зупинки."""
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+
+        for signal_number in (signal.SIGTERM, signal.SIGINT):
+            try:
+                self._loop.add_signal_handler(signal_number, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        tasks = [asyncio.create_task(self._run_job(job), name=job.name) for job in self.jobs]
+        await self._stopping.wait()
+        logger.info("Зупиняємо планувальник")
+        self._deadline = time.monotonic() + self.shutdown_timeout
+
+        _, pending = await asyncio.wait(tasks, timeout=self.shutdown_timeout)
+        for task in pending:
+            logger.warning(f"Job {task.get_name()} did not finish within {self.shutdown_timeout} s")
+            task.cancel()
+
+    def remaining(self) -> float:
+        """Повертає час у секундах, що залишився до завершення терміну зупинки; до зупинки — shutdown_timeout."""
+        if self._deadline is None:
+            return self.shutdown_timeout
+        return max(0.0, self._deadline - time.monotonic())
+
+    def stop(self) -> None:
+        """Припиняє планування нових запусків; безпечно викликати з будь-якого потоку."""
+        self.stop_event.set()
+        if self._loop is not None and self._stopping is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+
+    async def _run_job(self, job: Job) -> None:
+        loop = asyncio.get_running_loop()
+        next_run = loop.time()
+
+        while not self._stopping.is_set():
+            if not job.scheduled or self.is_active is None or self.is_active():
+                await self._execute(job)
+
+            next_run = max(next_run + job.next_interval(), loop.time())
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=next_run - loop.time())
+            except asyncio.TimeoutError:
+                pass
+
+    async def _execute(self, job: Job) -> None:
+        """Виконує задачу у фоновому потоці, який не заважає завершенню процесу."""
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+
+        def target() -> None:
+            try:
+                job.func()
+            except Exception as e:
+                logger.exception(f"Job {job.name} failed: {e}")
+            finally:
+                try:
+                    loop.call_soon_threadsafe(lambda: done.done() or done.set_result(None))
+                except RuntimeError:
+                    # Цикл подій уже закрито: процес завершується
+                    pass
+
+        Thread(target=target, name=job.name, daemon=True).start()
+        await done
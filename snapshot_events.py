@@ -0,0 +1,68 @@
+import sys
+from queue import Queue, Empty
+from threading import Lock, Thread
+from typing import Callable, Iterable, Optional
+
+from loguru import logger
+
+logger.remove()
+logger.add(sys.stdout, colorize=True)
+
+
+class SnapshotEvents:
+    """
+    Події "знімок біржі збережено", які отримувач даних публікує після фіксації знімка у базі даних.
+
+    Обробники викликаються у фоновому потоці, тож публікація не затримує отримання даних інших бірж.
+    Події, що накопичилися, поки обробник працював, об'єднуються: обробник отримує множину назв бірж
+    і викликається один раз для всіх них.
+    """
+
+    def __init__(self):
+        self._handlers: list[Callable[[set[str]], None]] = []
+        self._queue: Queue[Optional[set[str]]] = Queue()
+        self._thread: Optional[Thread] = None
+        self._lock = Lock()
+
+    def subscribe(self, handler: Callable[[set[str]], None]) -> None:
+        """Додає обробник, що отримує множину назв бірж зі свіжими знімками, та запускає робочий потік."""
+        with self._lock:
+            self._handlers.append(handler)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(target=self._run, name='snapshot-events', daemon=True)
+                self._thread.start()
+
+    def publish(self, exchange_names: Iterable[str]) -> None:
+        """Публікує подію для бірж exchange_names; без обробників подія відкидається."""
+        if self._handlers:
+            self._queue.put(set(exchange_names))
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Обробляє події, що залишилися в черзі, та зупиняє робочий потік."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except Empty:
+                    break
+
+            exchange_names = set().union(*(item for item in items if item is not None))
+            if exchange_names:
+                for handler in list(self._handlers):
+                    try:
+                        handler(exchange_names)
+                    except Exception as e:
+                        logger.exception(f"Snapshot handler failed for {exchange_names}: {e}")
+
+            if None in items:
+                return
+
+
+# Спільний для процесу канал подій про збережені знімки
+snapshot_events = SnapshotEvents()
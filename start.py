@@ -1,14 +1,25 @@
 import os
-import random
-from threading import Thread
-from time import sleep, localtime, strftime
+import sys
+import asyncio
+from functools import partial
+from threading import Event
+from typing import Optional
+from datetime import timedelta
+from time import localtime, strftime
 
 from loguru import logger
 from dotenv import load_dotenv
-from database import SessionLocal
+from database import SessionLocal, migrate_schema
+from scheduler import Job, Scheduler
+from http_client import host_limiter
+from fetch_cadence import FetchCadence
+from price_window import price_window
+from telegram_queue import stop_delivery_queues
+from snapshot_events import snapshot_events
+from metrics import start_metrics_server
 from old_data_remover import delete_old_records
 from market_reporter import run_report_generation
-from market_data_fetcher import process_market_pair_data
+from market_data_fetcher import fetch_and_store_exchange, process_market_pair_data
 
 load_dotenv()
 
@@ -23,55 +34,155 @@ def is_within_schedule() -> bool:
         return True
 
     logger.info(f"Current time {current_time} is outside the schedule ({start_time} - {end_time}).")
-    sleep(1800)
     return False
 
 
-def fetch_market_data():
-    """Отримує дані ринку в межах робочого часу."""
-    exchanges = os.getenv('EXCHANGES').split(',')
-
-    while True:
-        if is_within_schedule():
-            process_market_pair_data(coin_limit=int(os.getenv('PARSING_LIMIT')), exchanges=exchanges, save=False)
-            sleep(random.uniform(400, 600))
-
-
-def generate_reports():
-    """Генерує звіти в межах робочого часу."""
-
-    while True:
-        if is_within_schedule():
-            run_report_generation(
-                threshold=float(os.getenv('THRESHOLD')),
-                telegram_token=os.getenv('TG_TOKEN'),
-                telegram_chat_id=os.getenv('TG_CHAT_ID')
-            )
-            sleep(int(os.getenv('CHECK_INTERVAL')))
+def fetch_market_data(stop: Optional[Event] = None):
+    """Отримує дані ринку з усіх бірж; stop перериває очікування під час зупинки процесу."""
+    process_market_pair_data(
+        coin_limit=int(os.getenv('PARSING_LIMIT')),
+        exchanges=os.getenv('EXCHANGES').split(','),
+        save=False,
+        concurrency=int(os.getenv('FETCH_CONCURRENCY', 3)),
+        jitter=float(os.getenv('FETCH_JITTER', 5)),
+        batch_size=int(os.getenv('INSERT_BATCH_SIZE', 1000)),
+        page_size=int(os.getenv('FETCH_PAGE_SIZE', 0)),
+        page_retries=int(os.getenv('FETCH_PAGE_RETRIES', 2)),
+        keyframe_interval=float(os.getenv('DELTA_KEYFRAME_INTERVAL', 0)),
+        stop=stop
+    )
+
+
+def fetch_exchange_data(exchange: str, cadence: FetchCadence, stop: Optional[Event] = None):
+    """Отримує дані ринку однієї біржі та оновлює її інтервал опитування."""
+    exchange_names = fetch_and_store_exchange(
+        coin_limit=int(os.getenv('PARSING_LIMIT')),
+        exchange=exchange,
+        save=False,
+        jitter=float(os.getenv('FETCH_JITTER', 5)),
+        batch_size=int(os.getenv('INSERT_BATCH_SIZE', 1000)),
+        page_size=int(os.getenv('FETCH_PAGE_SIZE', 0)),
+        page_retries=int(os.getenv('FETCH_PAGE_RETRIES', 2)),
+        keyframe_interval=float(os.getenv('DELTA_KEYFRAME_INTERVAL', 0)),
+        stop=stop
+    )
+    cadence.record(exchange, exchange_names)
+    logger.info(f"Next {exchange} fetch in {cadence.interval(exchange):.0f} s")
+
+
+def report_lookback() -> timedelta:
+    """
+    Проміжок перед вікном звітів, за який у режимі дельт вибираються ціни, що діяли на початку вікна.
+    Опорні знімки біржі віддалені не більше ніж на DELTA_KEYFRAME_INTERVAL плюс найдовший проміжок між
+    її знімками: FETCH_INTERVAL + FETCH_INTERVAL_JITTER або FETCH_MAX_INTERVAL в адаптивному режимі,
+    та FETCH_JITTER затримки перед запитом.
+    """
+    keyframe_interval = float(os.getenv('DELTA_KEYFRAME_INTERVAL', 0))
+    if keyframe_interval <= 0:
+        return timedelta(0)
+
+    if os.getenv('FETCH_CADENCE', 'fixed') == 'adaptive':
+        fetch_gap = float(os.getenv('FETCH_MAX_INTERVAL', 1200))
+    else:
+        fetch_gap = float(os.getenv('FETCH_INTERVAL', 400)) + float(os.getenv('FETCH_INTERVAL_JITTER', 200))
+    return timedelta(seconds=keyframe_interval + fetch_gap + float(os.getenv('FETCH_JITTER', 5)))
+
+
+def generate_reports(exchanges: Optional[set[str]] = None):
+    """Генерує звіти (лише для бірж exchanges, якщо задано) та надсилає їх у Telegram."""
+    run_report_generation(
+        threshold=float(os.getenv('THRESHOLD')),
+        telegram_token=os.getenv('TG_TOKEN'),
+        telegram_chat_id=os.getenv('TG_CHAT_ID'),
+        incremental=os.getenv('REPORT_MODE', 'full') == 'incremental',
+        swings=os.getenv('REPORT_DETECTOR', 'first') == 'swing',
+        queued=os.getenv('TG_DELIVERY', 'queue') == 'queue',
+        exchanges=exchanges,
+        lookback=report_lookback(),
+        stale_policy=os.getenv('STALE_EXCHANGES', 'flag')
+    )
+
+
+def report_snapshot(exchanges: set[str]):
+    """Генерує звіти для бірж, щойно їхні знімки збережено, в межах робочого часу."""
+    if is_within_schedule():
+        generate_reports(exchanges)
 
 
 def remove_old_records():
-    """Видаляє старі записи постійно."""
-
-    while True:
-        if is_within_schedule():
-            with SessionLocal() as db_session:
-                delete_old_records(session=db_session, hours=int(os.getenv('HOURS_TO_REMOVE')))
-            sleep(int(os.getenv('REMOVE_CHECK_INTERVAL')))
+    """Видаляє старі записи."""
+    with SessionLocal() as db_session:
+        delete_old_records(
+            session=db_session,
+            hours=int(os.getenv('HOURS_TO_REMOVE')),
+            hours_ahead=int(os.getenv('PARTITION_HOURS_AHEAD', 24)),
+            batch_size=int(os.getenv('DELETE_BATCH_SIZE', 0)),
+            pause=float(os.getenv('DELETE_BATCH_PAUSE', 0))
+        )
+
+
+def shutdown(scheduler: Scheduler) -> None:
+    """
+    Обробляє останні події та доставляє повідомлення, що залишилися в черзі, у межах терміну зупинки
+    планувальника і завершує процес. Робочі потоки пулів, які ще чекають відповіді API чи бази даних,
+    утримували б інтерпретатор після виходу, тож процес завершується через os._exit.
+    """
+    snapshot_events.stop(scheduler.remaining())
+    stop_delivery_queues(scheduler.remaining())
+    logger.info("Процес зупинено")
+    sys.stdout.flush()
+    os._exit(0)
 
 
 if __name__ == '__main__':
-    # Створюємо потоки
-    fetch_thread = Thread(target=fetch_market_data)
-    report_thread = Thread(target=generate_reports)
-    removal_thread = Thread(target=remove_old_records)
-
-    # Запускаємо потоки
-    fetch_thread.start()
-    report_thread.start()
-    removal_thread.start()
-
-    # Очікуємо завершення потоків (необов'язково)
-    fetch_thread.join()
-    report_thread.join()
-    removal_thread.join()
+    # Метрики Prometheus доступні локально, якщо METRICS_PORT не 0
+    metrics_port = int(os.getenv('METRICS_PORT', 9108))
+    if metrics_port:
+        start_metrics_server(metrics_port, os.getenv('METRICS_ADDR', '127.0.0.1'))
+
+    # Оновлюємо схему бази даних перед запуском
+    migrate_schema(partitioned=os.getenv('PARTITION_MARKET_PAIRS', 'false').lower() == 'true')
+
+    # Сховище цін тримає і проміжок перед вікном звітів, з якого в режимі дельт береться ціна на початку вікна
+    price_window.set_lookback(report_lookback().total_seconds())
+
+    shutdown_timeout = float(os.getenv('SHUTDOWN_TIMEOUT', 8))
+    fetch_interval = float(os.getenv('FETCH_INTERVAL', 400))
+    fetch_interval_jitter = float(os.getenv('FETCH_INTERVAL_JITTER', 200))
+    stop_event = Event()
+    jobs = [Job('retention', remove_old_records, interval=float(os.getenv('REMOVE_CHECK_INTERVAL')))]
+
+    # В адаптивному режимі кожна біржа опитується окремою задачею з інтервалом за розкидом змін цін
+    if os.getenv('FETCH_CADENCE', 'fixed') == 'adaptive':
+        exchanges = os.getenv('EXCHANGES').split(',')
+        host_limiter.set_limit(int(os.getenv('FETCH_CONCURRENCY', 3)))
+        # Базовий інтервал дорівнює середньому інтервалу фіксованого режиму, тож бюджет не перевищує його навантаження
+        fetch_cadence = FetchCadence(
+            exchanges,
+            base_interval=fetch_interval + fetch_interval_jitter / 2,
+            min_interval=float(os.getenv('FETCH_MIN_INTERVAL', 120)),
+            max_interval=float(os.getenv('FETCH_MAX_INTERVAL', 1200)),
+            request_budget=float(os.getenv('FETCH_REQUEST_BUDGET', 0)) or None,
+            reference=float(os.getenv('FETCH_CADENCE_REFERENCE', 0.005))
+        )
+        jobs.extend(
+            Job(
+                f'fetch-{exchange}', partial(fetch_exchange_data, exchange, fetch_cadence, stop_event),
+                interval=partial(fetch_cadence.interval, exchange)
+            )
+            for exchange in exchanges
+        )
+    else:
+        jobs.append(
+            Job('fetch', partial(fetch_market_data, stop_event), interval=fetch_interval, jitter=fetch_interval_jitter))
+
+    # У режимі event звіти генеруються після збереження кожного знімка, інакше — з інтервалом CHECK_INTERVAL
+    if os.getenv('REPORT_TRIGGER', 'interval') == 'event':
+        snapshot_events.subscribe(report_snapshot)
+    else:
+        jobs.append(Job('report', generate_reports, interval=float(os.getenv('CHECK_INTERVAL'))))
+
+    scheduler = Scheduler(
+        jobs=jobs, is_active=is_within_schedule, shutdown_timeout=shutdown_timeout, stop_event=stop_event)
+    asyncio.run(scheduler.run())
+    shutdown(scheduler)
@@ -0,0 +1,177 @@
+import os
+import sys
+import time
+from queue import Queue, Empty
+from threading import Lock, Thread
+from typing import Optional
+
+import requests
+from loguru import logger
+from dotenv import load_dotenv
+
+from http_client import http_post
+from metrics import TELEGRAM_SEND_SECONDS
+
+load_dotenv()
+
+logger.remove()
+logger.add(sys.stdout, colorize=True)
+
+# Максимальна довжина тексту одного повідомлення Telegram
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+
+class TelegramDeliveryQueue:
+    """
+    Фонова черга доставки повідомлень у Telegram.
+
+    Повідомлення ставляться у чергу без очікування відправлення. Робочий потік об'єднує повідомлення,
+    що накопичилися для одного чату, у пакети до TELEGRAM_MESSAGE_LIMIT символів, витримує мінімальний
+    інтервал між повідомленнями в кожен чат і повторює відправлення при 429 (з затримкою retry_after,
+    яку повідомляє Telegram) та 5xx або помилках з'єднання (з експоненційною затримкою).
+    """
+
+    def __init__(self, token: str, min_interval: float = 3.0, max_retries: int = 5, backoff: float = 1.0):
+        self.token = token
+        self.min_interval = min_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._queue: Queue[Optional[tuple[str, str]]] = Queue()
+        self._next_send_at: dict[str, float] = {}
+        self._thread: Optional[Thread] = None
+        self._lock = Lock()
+
+    def start(self) -> None:
+        """Запускає робочий потік, якщо його ще не запущено."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(target=self._run, name='telegram-delivery', daemon=True)
+                self._thread.start()
+
+    def enqueue(self, chat_id: str, message: str) -> None:
+        """Ставить повідомлення у чергу на відправлення."""
+        self.start()
+        self._queue.put((chat_id, message))
+
+    def join(self) -> None:
+        """Очікує доставки всіх повідомлень, поставлених у чергу."""
+        self._queue.join()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Доставляє повідомлення, що залишилися в черзі, та зупиняє робочий потік."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            items = [self._queue.get()]
+            # Забираємо все, що накопичилося, щоб об'єднати повідомлення в пакети
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except Empty:
+                    break
+
+            try:
+                messages = [item for item in items if item is not None]
+                for chat_id, text in self._batch(messages):
+                    self._deliver(chat_id, text)
+            except Exception as err:
+                logger.error(f"Telegram delivery failed: {err}")
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+            if None in items:
+                return
+
+    @staticmethod
+    def _batch(messages: list[tuple[str, str]]) -> list[tuple[str, str]]:
+        """Об'єднує послідовні повідомлення одного чату, не перевищуючи TELEGRAM_MESSAGE_LIMIT."""
+        batches: list[tuple[str, str]] = []
+        for chat_id, text in messages:
+            if batches and batches[-1][0] == chat_id \
+                    and len(batches[-1][1]) + 1 + len(text) <= TELEGRAM_MESSAGE_LIMIT:
+                batches[-1] = (chat_id, f"{batches[-1][1]}\n{text}")
+            else:
+                batches.append((chat_id, text))
+        return batches
+
+    def _deliver(self, chat_id: str, text: str) -> None:
+        """Надсилає одне повідомлення з урахуванням ліміту чату та повторами."""
+        url = f"https://api.telegram.org/bot{self.token}/sendMessage"
+        data = {
+            'chat_id': chat_id,
+            'text': text,
+            'parse_mode': 'HTML',
+            'disable_web_page_preview': True
+        }
+
+        for attempt in range(self.max_retries + 1):
+            delay = self._next_send_at.get(chat_id, 0) - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_send_at[chat_id] = time.monotonic() + self.min_interval
+
+            started = time.perf_counter()
+            try:
+                response = http_post(url, data=data)
+            except requests.exceptions.RequestException as err:
+                TELEGRAM_SEND_SECONDS.labels('error').observe(time.perf_counter() - started)
+                logger.warning(f"Telegram request failed: {err}")
+                time.sleep(self.backoff * 2 ** attempt)
+                continue
+
+            TELEGRAM_SEND_SECONDS.labels(str(response.status_code)).observe(time.perf_counter() - started)
+            if response.status_code == 429:
+                retry_after = self._retry_after(response)
+                logger.warning(f"Telegram rate limit hit, retrying after {retry_after} s")
+                self._next_send_at[chat_id] = time.monotonic() + retry_after
+                continue
+
+            if response.status_code >= 500:
+                logger.warning(f"Telegram server error {response.status_code}, retrying")
+                time.sleep(self.backoff * 2 ** attempt)
+                continue
+
+            if response.ok and response.json().get('ok'):
+                logger.success('Message sent successfully!')
+            else:
+                logger.error(f"Error sending message: {response.text}")
+            return
+
+        logger.error(f"Message to chat {chat_id} dropped after {self.max_retries + 1} attempts")
+
+    def _retry_after(self, response: requests.Response) -> float:
+        """Повертає затримку з поля parameters.retry_after відповіді 429."""
+        try:
+            return float(response.json()['parameters']['retry_after'])
+        except (ValueError, KeyError, TypeError):
+            return self.backoff
+
+
+_queues: dict[str, TelegramDeliveryQueue] = {}
+_queues_lock = Lock()
+
+
+def get_delivery_queue(token: str) -> TelegramDeliveryQueue:
+    """Повертає спільну для процесу чергу доставки для токена бота, створюючи її за потреби."""
+    with _queues_lock:
+        if token not in _queues:
+            _queues[token] = TelegramDeliveryQueue(
+                token,
+                min_interval=float(os.getenv('TG_MIN_INTERVAL', 3)),
+                max_retries=int(os.getenv('TG_MAX_RETRIES', 5)),
+                backoff=float(os.getenv('TG_BACKOFF', 1.0))
+            )
+        return _queues[token]
+
+
+def stop_delivery_queues(timeout: Optional[float] = None) -> None:
+    """Доставляє залишок повідомлень і зупиняє всі черги процесу, витрачаючи на всі черги разом не більше timeout."""
+    with _queues_lock:
+        queues = list(_queues.values())
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for delivery_queue in queues:
+        delivery_queue.stop(None if deadline is None else max(0.0, deadline - time.monotonic()))
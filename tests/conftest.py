@@ -0,0 +1,4 @@
+import os
+
+# Модулі проєкту створюють рушій бази даних під час імпорту; тестам достатньо SQLite у пам'яті
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
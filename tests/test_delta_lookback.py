@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import migrate_schema
+from market_data_fetcher import StoredPriceCache, market_pair_ids, save_market_pair_data_bulk
+from market_reporter import generate_reports
+from price_window import PriceWindowStore
+from start import report_lookback
+
+KEYFRAME_INTERVAL = 3600
+FETCH_INTERVAL = 550
+
+
+def snapshots(now: datetime) -> list[list[dict]]:
+    """
+    Знімки біржі кожні FETCH_INTERVAL секунд. Опорний знімок припадає на 10 с раніше, ніж KEYFRAME_INTERVAL
+    до початку вікна 3 години, наступний — через 4 хв після початку вікна, а пара MOVE/USDT через 3 хв після
+    початку вікна дорожчає зі 100 до 115.
+    """
+    window_start = now - timedelta(hours=3)
+    keyframe = window_start - timedelta(seconds=KEYFRAME_INTERVAL + 10)
+    result = []
+    timestamp = keyframe
+    while timestamp <= now:
+        moved = timestamp >= window_start + timedelta(minutes=3)
+        result.append([
+            {
+                'market_pair': market_pair,
+                'exchange_name': 'binance',
+                'category': 'spot',
+                'market_url': f'https://x/{market_pair}',
+                'price': price,
+                'timestamp': timestamp
+            }
+            for market_pair, price in (('MOVE/USDT', 115.0 if moved else 100.0), ('QUIET/USDT', 50.0))
+        ])
+        timestamp += timedelta(seconds=FETCH_INTERVAL)
+    return result
+
+
+def store(engine, snapshots_list: list[list[dict]], keyframe_interval: float) -> None:
+    """Зберігає знімки так само, як отримувач даних; keyframe_interval > 0 вмикає дельта-запис."""
+    stored_prices = StoredPriceCache()
+    market_pair_ids.clear()
+    with sessionmaker(bind=engine)() as session:
+        for snapshot in snapshots_list:
+            rows, keyframe = stored_prices.changes(snapshot, keyframe_interval) if keyframe_interval else (snapshot, True)
+            save_market_pair_data_bulk(session, rows)
+            stored_prices.commit(rows, keyframe)
+    market_pair_ids.clear()
+
+
+@pytest.fixture
+def lookback(monkeypatch) -> timedelta:
+    monkeypatch.setenv('DELTA_KEYFRAME_INTERVAL', str(KEYFRAME_INTERVAL))
+    monkeypatch.setenv('FETCH_CADENCE', 'fixed')
+    monkeypatch.setenv('FETCH_INTERVAL', str(FETCH_INTERVAL))
+    monkeypatch.setenv('FETCH_INTERVAL_JITTER', '0')
+    monkeypatch.setenv('FETCH_JITTER', '0')
+    return report_lookback()
+
+
+def test_lookback_covers_keyframe_gap(lookback):
+    assert lookback == timedelta(seconds=KEYFRAME_INTERVAL + FETCH_INTERVAL)
+
+
+def test_delta_report_keeps_carry_in(tmp_path, lookback):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    snapshots_list = snapshots(now)
+    reports = {}
+    for name, keyframe_interval in (('full', 0), ('delta', KEYFRAME_INTERVAL)):
+        engine = create_engine(f"sqlite:///{tmp_path / name}.db")
+        migrate_schema(engine)
+        store(engine, snapshots_list, keyframe_interval)
+        with sessionmaker(bind=engine)() as session:
+            reports[name] = generate_reports(session, 10.0, store=PriceWindowStore(), lookback=lookback)
+        engine.dispose()
+
+    assert reports['delta'] == reports['full']
+    assert [report['change_percentage'] for report in reports['delta']['binance']['3 hours']] == [pytest.approx(15)]
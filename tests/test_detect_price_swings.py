@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from market_reporter import MarketPairRow, detect_price_swings
+
+START = datetime(2026, 1, 1)
+
+
+def series(*prices: float) -> list[MarketPairRow]:
+    return [
+        MarketPairRow('P/USDT', 'binance', price, START + timedelta(minutes=minute), 'https://x/P')
+        for minute, price in enumerate(prices)
+    ]
+
+
+@pytest.mark.parametrize('threshold', [0.0, -1.0])
+@pytest.mark.parametrize('prices', [(1.0,), (1.0, 1.0, 1.0)])
+def test_flat_pair_is_skipped_at_non_positive_threshold(prices, threshold):
+    swings = detect_price_swings({'P/USDT': series(*prices)}, START, timedelta(minutes=10), threshold, set())
+
+    assert swings == []
+
+
+def test_reports_larger_swing():
+    swings = detect_price_swings({'P/USDT': series(100, 120, 90)}, START, timedelta(minutes=10), 10.0, set())
+
+    assert [swing['change_percentage'] for swing in swings] == [pytest.approx(-25)]
+    assert swings[0]['max_run_up'] == pytest.approx(20)
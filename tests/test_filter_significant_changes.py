@@ -0,0 +1,89 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from benchmarks.baseline import filter_significant_changes as baseline_filter_significant_changes
+from market_reporter import (
+    MarketPairRow, PriceColumns, filter_interval_changes, filter_significant_changes, partition_market_data,
+    slice_interval)
+
+
+def random_window(rng: random.Random) -> list[MarketPairRow]:
+    """Вікно з кількох бірж і пар із ненульовими цінами; записи впорядковані за парою або перемішані."""
+    start = datetime(2026, 1, 1)
+    volatility = rng.choice([0.005, 0.03, 0.1])
+    rows = []
+    for pair in range(rng.randint(1, 30)):
+        exchange = rng.choice(['binance', 'mexc', 'bybit'])
+        price = rng.uniform(0.001, 100)
+        for point in range(rng.randint(1, 20)):
+            if point:
+                price *= 1 + rng.uniform(-volatility, volatility)
+            timestamp = start + timedelta(minutes=point)
+            rows.append(MarketPairRow(f'P{pair}', exchange, price, timestamp, f'https://x/{pair}'))
+    if rng.random() < 0.5:
+        rng.shuffle(rows)
+    return rows
+
+
+@pytest.mark.parametrize('seed', range(2000))
+def test_matches_baseline(seed):
+    rng = random.Random(seed)
+    market_data = random_window(rng)
+    threshold = rng.choice([0.5, 2.0, 5.0, 10.0])
+    processed = {f'P{pair}' for pair in range(30) if rng.random() < 0.2}
+
+    expected_processed, actual_processed = set(processed), set(processed)
+    expected = baseline_filter_significant_changes(market_data, threshold, expected_processed)
+    actual = filter_significant_changes(market_data, threshold, actual_processed)
+
+    assert actual == expected
+    assert actual_processed == expected_processed
+    assert all(type(change['change_percentage']) is float for change in actual)
+
+
+@pytest.mark.parametrize('seed', range(500))
+def test_interval_changes_match_baseline(seed):
+    rng = random.Random(seed)
+    market_data = sorted(random_window(rng), key=lambda row: (row.exchange_name, row.market_pair, row.timestamp))
+    threshold = rng.choice([0.5, 2.0, 5.0, 10.0])
+    processed = {f'P{pair}' for pair in range(30) if rng.random() < 0.2}
+    expected_processed, actual_processed = set(processed), set(processed)
+
+    for market_pairs in partition_market_data(market_data).values():
+        columns = PriceColumns(market_pairs)
+        # Інтервали від найширшого до найкоротшого, як у generate_reports(), зі спільною множиною оброблених пар
+        for minutes in sorted(rng.sample(range(-1, 22), 4)):
+            start_time = datetime(2026, 1, 1) + timedelta(minutes=minutes, seconds=rng.choice([0, 30]))
+            step = rng.random() < 0.5
+            expected = baseline_filter_significant_changes(
+                slice_interval(market_pairs, start_time, step), threshold, expected_processed)
+            actual = filter_interval_changes(columns, start_time, threshold, actual_processed, step)
+
+            assert actual == expected
+            assert actual_processed == expected_processed
+
+
+def test_empty_window():
+    processed = set()
+    assert filter_significant_changes([], 5.0, processed) == []
+    assert processed == set()
+    assert filter_interval_changes(PriceColumns({}), datetime(2026, 1, 1), 5.0, processed) == []
+    assert processed == set()
+
+
+def test_zero_initial_price_is_ignored():
+    start = datetime(2026, 1, 1)
+    market_data = [
+        MarketPairRow('ZERO', 'ex', 0.0, start, 'u'),
+        MarketPairRow('ZERO', 'ex', 1.0, start + timedelta(minutes=1), 'u'),
+        MarketPairRow('MOVE', 'ex', 1.0, start, 'u'),
+        MarketPairRow('MOVE', 'ex', 1.2, start + timedelta(minutes=1), 'u'),
+    ]
+    processed = set()
+
+    changes = filter_significant_changes(market_data, 10.0, processed)
+
+    assert [change['market_pair'] for change in changes] == ['MOVE (ex)']
+    assert processed == {'MOVE'}
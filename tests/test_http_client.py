@@ -0,0 +1,20 @@
+from http_client import create_http_session
+
+
+def retry_policy(url: str):
+    session = create_http_session()
+    return session.get_adapter(url).max_retries
+
+
+def test_api_does_not_retry_or_wait_on_rate_limit():
+    retry = retry_policy('https://api.coinmarketcap.com/data-api/v3/')
+
+    assert not retry.is_retry('GET', 429, has_retry_after=True)
+    assert retry.is_retry('GET', 503, has_retry_after=True)
+    assert not retry.respect_retry_after_header
+
+
+def test_telegram_does_not_wait_for_retry_after():
+    retry = retry_policy('https://api.telegram.org/bot/sendMessage')
+
+    assert not retry.is_retry('POST', 429, has_retry_after=True)
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import MetaData, create_engine, inspect, insert, select, text
+
+from benchmarks.baseline import legacy_market_pairs
+from database import MarketPairData, MarketPairInfo, migrate_schema
+
+LEGACY_ROWS = [
+    {
+        'market_pair': f'P{pair}/USDT',
+        'exchange_name': exchange,
+        'category': 'spot',
+        'market_url': f'https://x/{exchange}/{pair}',
+        'price': float(pair + point),
+        'timestamp': datetime(2026, 1, 1) + timedelta(minutes=point)
+    }
+    for exchange in ('binance', 'mexc')
+    for pair in range(5)
+    for point in range(3)
+]
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    """База SQLite зі старою широкою таблицею market_pairs."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    table = legacy_market_pairs.to_metadata(MetaData(), name='market_pairs')
+    table.create(engine)
+    with engine.begin() as connection:
+        # Індекс з тим самим іменем, що й у новій схемі, як у розгортаннях після додавання індексів
+        connection.execute(text("CREATE INDEX ix_market_pairs_timestamp ON market_pairs (timestamp)"))
+        connection.execute(insert(table), LEGACY_ROWS)
+    yield engine
+    engine.dispose()
+
+
+def migrated_rows(engine) -> list[tuple]:
+    """Записи нової схеми у вигляді рядків старої таблиці."""
+    info, prices = MarketPairInfo.__table__, MarketPairData.__table__
+    with engine.connect() as connection:
+        return sorted(connection.execute(
+            select(
+                info.c.market_pair, info.c.exchange_name, info.c.category, info.c.market_url,
+                prices.c.price, prices.c.timestamp
+            ).join(info, info.c.id == prices.c.pair_id)
+        ))
+
+
+def expected_rows() -> list[tuple]:
+    return sorted(
+        (row['market_pair'], row['exchange_name'], row['category'], row['market_url'], row['price'], row['timestamp'])
+        for row in LEGACY_ROWS
+    )
+
+
+def test_converts_legacy_table(legacy_engine):
+    migrate_schema(legacy_engine)
+
+    assert migrated_rows(legacy_engine) == expected_rows()
+    tables = set(inspect(legacy_engine).get_table_names())
+    assert {'market_pairs_legacy', 'market_pairs_new'}.isdisjoint(tables)
+    indexes = {index['name'] for index in inspect(legacy_engine).get_indexes('market_pairs')}
+    assert {index.name for index in MarketPairData.__table__.indexes} <= indexes
+
+
+def test_resumes_interrupted_copy(legacy_engine):
+    # Перенос перервався після створення довідника та частини нової таблиці, але до заміни
+    MarketPairInfo.__table__.create(legacy_engine)
+    with legacy_engine.begin() as connection:
+        connection.execute(insert(MarketPairInfo.__table__), [
+            {'exchange_name': 'binance', 'market_pair': 'P0/USDT', 'category': 'spot', 'market_url': 'https://x/binance/0'}
+        ])
+        connection.execute(text("CREATE TABLE market_pairs_new (id INTEGER PRIMARY KEY, pair_id INTEGER, price FLOAT)"))
+
+    migrate_schema(legacy_engine)
+
+    assert migrated_rows(legacy_engine) == expected_rows()
+
+
+def test_finishes_interrupted_swap(legacy_engine):
+    migrate_schema(legacy_engine)
+    # Заміну перервано між перейменуваннями: нова таблиця ще не отримала ім'я market_pairs
+    with legacy_engine.begin() as connection:
+        connection.execute(text("ALTER TABLE market_pairs RENAME TO market_pairs_new"))
+        connection.execute(text("CREATE TABLE market_pairs_legacy (id INTEGER PRIMARY KEY)"))
+
+    migrate_schema(legacy_engine)
+
+    assert migrated_rows(legacy_engine) == expected_rows()
+    assert 'market_pairs_legacy' not in inspect(legacy_engine).get_table_names()
@@ -0,0 +1,105 @@
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import market_data_fetcher
+from database import migrate_schema
+from exchange_health import ExchangeHealth
+from market_data_fetcher import StoredPriceCache, fetch_and_store_exchange, fetch_exchange_market_data_paged
+
+TOTAL = 25
+PAGE_SIZE = 10
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, content: bytes):
+        self.status_code = status_code
+        self.content = content
+
+
+def page(start: int, limit: int) -> bytes:
+    """Сторінка відповіді API з парами start..start+limit-1 із TOTAL."""
+    pairs = [
+        {
+            'exchangeName': 'Binance',
+            'marketPair': f'C{index}/USDT',
+            'category': 'spot',
+            'marketUrl': f'https://x/{index}',
+            'price': float(index)
+        }
+        for index in range(start, min(start + limit, TOTAL + 1))
+    ]
+    return json.dumps({
+        'data': {'numMarketPairs': TOTAL, 'marketPairs': pairs},
+        'status': {'timestamp': '2026-01-01T00:00:00Z'}
+    }).encode()
+
+
+class FakeApi:
+    """Відповідає сторінками; failures задає для сторінки (start) послідовність відповідей перед успішною."""
+
+    def __init__(self, failures: dict[int, list[FakeResponse]]):
+        self.failures = failures
+        self.requests: dict[int, int] = {}
+
+    def __call__(self, url: str, **kwargs) -> FakeResponse:
+        query = parse_qs(urlsplit(url).query)
+        start, limit = int(query['start'][0]), int(query['limit'][0])
+        self.requests[start] = self.requests.get(start, 0) + 1
+        pending = self.failures.get(start)
+        if pending:
+            return pending.pop(0)
+        return FakeResponse(200, page(start, limit))
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    def install(failures: dict[int, list[FakeResponse]]) -> FakeApi:
+        api = FakeApi(failures)
+        monkeypatch.setattr(market_data_fetcher, 'http_get', api)
+        monkeypatch.setattr(market_data_fetcher, 'HTTP_BACKOFF', 0)
+        return api
+    return install
+
+
+def test_http_error_page_is_not_retried(fake_api):
+    api = fake_api({11: [FakeResponse(503, b'')]})
+
+    snapshot, missing_pages = fetch_exchange_market_data_paged(TOTAL, 'binance', PAGE_SIZE, retries=2)
+
+    assert missing_pages == 1
+    assert api.requests[11] == 1
+    assert len(snapshot.data.marketPairs) == TOTAL - PAGE_SIZE
+
+
+def test_invalid_page_is_retried(fake_api):
+    api = fake_api({11: [FakeResponse(200, b'{"data": {}}')]})
+
+    snapshot, missing_pages = fetch_exchange_market_data_paged(TOTAL, 'binance', PAGE_SIZE, retries=2)
+
+    assert missing_pages == 0
+    assert api.requests[11] == 2
+    assert len(snapshot.data.marketPairs) == TOTAL
+
+
+def test_degraded_snapshot_counts_as_failure_and_is_not_keyframe(fake_api, monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fetch.db'}")
+    migrate_schema(engine)
+    health, stored_prices = ExchangeHealth(failure_threshold=1), StoredPriceCache()
+    monkeypatch.setattr(market_data_fetcher, 'SessionLocal', sessionmaker(bind=engine))
+    monkeypatch.setattr(market_data_fetcher, 'exchange_health', health)
+    monkeypatch.setattr(market_data_fetcher, 'stored_prices', stored_prices)
+    market_data_fetcher.market_pair_ids.clear()
+    fake_api({21: [FakeResponse(503, b'')]})
+
+    exchange_names = fetch_and_store_exchange(
+        TOTAL, 'binance', save=False, page_size=PAGE_SIZE, keyframe_interval=3600)
+
+    assert exchange_names == {'Binance'}
+    assert not health.allow('binance')
+    assert 'Binance' not in stored_prices._keyframes
+    market_data_fetcher.market_pair_ids.clear()
+    engine.dispose()
@@ -0,0 +1,92 @@
+import os
+import sys
+import time
+import asyncio
+import subprocess
+from pathlib import Path
+from threading import Event
+
+from market_data_fetcher import process_market_pair_data
+from scheduler import Job, Scheduler
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_shutdown_shares_one_deadline():
+    release = Event()
+    scheduler = Scheduler([Job('slow', lambda: release.wait(5), interval=60)], shutdown_timeout=0.5)
+
+    async def run() -> None:
+        asyncio.get_running_loop().call_later(0.1, scheduler.stop)
+        await scheduler.run()
+
+    started = time.monotonic()
+    asyncio.run(run())
+    release.set()
+
+    # Задача, що не завершилася, вичерпала термін: подальшим крокам зупинки часу не залишилось
+    assert time.monotonic() - started < 1.5
+    assert scheduler.remaining() == 0.0
+
+
+def test_remaining_after_quick_shutdown():
+    scheduler = Scheduler([Job('quick', lambda: None, interval=60)], shutdown_timeout=5)
+
+    async def run() -> None:
+        asyncio.get_running_loop().call_later(0.1, scheduler.stop)
+        await scheduler.run()
+
+    asyncio.run(run())
+
+    assert 4 < scheduler.remaining() <= 5
+
+
+# Задача планувальника, робочі потоки пулу якої не реагують на зупинку (запит до API, вставка у базу)
+POOL_JOB_SCRIPT = '''
+import time
+import asyncio
+
+import start
+import market_data_fetcher
+from scheduler import Job, Scheduler
+
+market_data_fetcher.fetch_and_store_exchange = lambda *args: time.sleep(6)
+scheduler = Scheduler([], shutdown_timeout=1)
+scheduler.jobs.append(Job('fetch', lambda: market_data_fetcher.process_market_pair_data(
+    10, ['binance', 'mexc'], False, concurrency=2, stop=scheduler.stop_event), interval=60, scheduled=False))
+
+
+async def run() -> None:
+    asyncio.get_running_loop().call_later(0.3, scheduler.stop)
+    await scheduler.run()
+
+asyncio.run(run())
+start.shutdown(scheduler)
+'''
+
+
+def test_process_exits_within_deadline_with_busy_pool_workers():
+    started = time.monotonic()
+    result = subprocess.run(
+        [sys.executable, '-c', POOL_JOB_SCRIPT], cwd=ROOT, env={**os.environ, 'DATABASE_URL': 'sqlite://'},
+        capture_output=True, timeout=30)
+
+    assert result.returncode == 0, result.stderr.decode()
+    assert time.monotonic() - started < 4
+
+
+def test_stop_interrupts_fetch_jitter():
+    stop = Event()
+    scheduler = Scheduler([], shutdown_timeout=5, stop_event=stop)
+    scheduler.jobs.append(Job('fetch', lambda: process_market_pair_data(
+        10, ['binance'], False, jitter=60, stop=stop), interval=60, scheduled=False))
+
+    async def run() -> None:
+        asyncio.get_running_loop().call_later(0.3, scheduler.stop)
+        await scheduler.run()
+
+    started = time.monotonic()
+    asyncio.run(run())
+
+    assert time.monotonic() - started < 2
+    assert scheduler.remaining() > 3
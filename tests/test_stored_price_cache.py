@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+import market_data_fetcher
+from exchange_health import ExchangeHealth
+from market_data_fetcher import ExchangeDataLite, ResponseDataLite, StatusLite, StoredPriceCache, fetch_and_store_exchange
+
+START = datetime(2026, 1, 1)
+
+
+def snapshot(minutes: int, *prices: float) -> list[dict]:
+    return [
+        {
+            'market_pair': f'P{index}/USDT',
+            'exchange_name': 'binance',
+            'category': 'spot',
+            'market_url': f'https://x/{index}',
+            'price': price,
+            'timestamp': START + timedelta(minutes=minutes)
+        }
+        for index, price in enumerate(prices)
+    ]
+
+
+def test_writes_changes_between_keyframes():
+    cache = StoredPriceCache()
+    for minutes, prices, expected in ((0, (1, 2), 2), (10, (1, 3), 1), (70, (1, 3), 2)):
+        rows, keyframe = cache.changes(snapshot(minutes, *prices), keyframe_interval=3600)
+        cache.commit(rows, keyframe)
+        assert (len(rows), keyframe) == (expected, expected == 2)
+
+
+def test_empty_snapshot_has_no_changes():
+    assert StoredPriceCache().changes([], keyframe_interval=3600) == ([], False)
+
+
+def test_empty_exchange_is_a_successful_fetch(monkeypatch):
+    health = ExchangeHealth(failure_threshold=1)
+    empty = ResponseDataLite(data=ExchangeDataLite(marketPairs=[]), status=StatusLite(timestamp=START))
+    monkeypatch.setattr(market_data_fetcher, 'exchange_health', health)
+    monkeypatch.setattr(market_data_fetcher, 'stored_prices', StoredPriceCache())
+    monkeypatch.setattr(market_data_fetcher, 'fetch_exchange_market_data', lambda **kwargs: empty)
+
+    assert fetch_and_store_exchange(100, 'binance', save=False, keyframe_interval=3600) == set()
+    assert health.allow('binance')
+    assert health._breakers['binance'].last_success is not None